@@ -0,0 +1,113 @@
+from dataclasses import dataclass, field, fields, asdict
+from datetime import datetime, timezone
+
+
+# --- Shared Article Record ---
+@dataclass(slots=True)
+class Article:
+    """
+    One news article as it moves through fetch → combine → dedup/score → save.
+    Every stage works on the same object instead of copying dicts.
+    """
+    title: str = ""
+    description: str = ""
+    author: str = None
+    source: str = ""
+    url: str = ""
+    image_url: str = None
+    category: str = None
+    tags: list = field(default_factory=list)
+    impact_score: float = None
+    popularity_score: int = 0
+    published_at: str = ""
+    fetched_at: str = ""
+
+    # filled in by filter_update_news
+    article_id: str = None
+    score: int = None
+    hotness: str = None
+    matched_keywords: dict = None
+    big_source: str = None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Article":
+        """
+        Build from a raw article dict (fetcher output or a saved JSON dump),
+        applying the same fallbacks normalize_article used to: summary →
+        description, publisher → source, published → published_at and
+        created_at → fetched_at. Unknown keys are dropped.
+        """
+        known = {f.name for f in fields(cls)}
+        article = cls(**{k: v for k, v in data.items() if k in known})
+        if "description" not in data:
+            article.description = data.get("summary", "")
+        if "source" not in data:
+            article.source = data.get("publisher", "")
+        if "published_at" not in data:
+            article.published_at = data.get("published", "")
+        if not article.fetched_at:
+            article.fetched_at = data.get("created_at", "")
+        return article
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    def to_mongo(self) -> dict:
+        """Mongo document for the news collection, minus server-owned fields."""
+        published_at = self.published_at
+        fetched_at = self.fetched_at
+
+        date_str = published_at.split("T")[0] if published_at else None
+
+        return {
+            "articleId": self.article_id,
+            "title": self.title,
+            "description": self.description,
+            "author": self.author,
+            "source": self.source,
+            "url": self.url,
+            "imageUrl": self.image_url,
+            "category": self.category,
+            "tags": self.tags,
+            "matchedKeywords": self.matched_keywords,
+
+            "publishedAt": datetime.fromisoformat(published_at.replace("Z", "+00:00")) if published_at else None,
+            "fetchedAt": datetime.fromisoformat(fetched_at.replace("Z", "+00:00")) if fetched_at else datetime.now(timezone.utc),
+            "date": date_str,
+
+            "score": self.score,
+            "hotness": self.hotness,
+            "impactScore": self.impact_score,
+            "popularityScore": self.popularity_score,
+
+            "updatedAt": datetime.now(timezone.utc)
+        }
+
+    def to_supabase(self) -> dict:
+        """
+        Row for the Supabase news table. Engagement counters and created_at
+        are left to the column defaults so an upsert never resets them.
+        """
+        return {
+            "article_id": self.article_id,
+            "title": self.title,
+            "description": self.description,
+            "author": self.author,
+            "source": self.source,
+            "url": self.url,
+            "image_url": self.image_url,
+            "category": self.category,
+            "tags": self.tags,
+            "published_at": self.published_at,
+            "score": self.score,
+            "hotness": self.hotness,
+            "impact_score": self.impact_score,
+            "popularity_score": self.popularity_score,
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+            #one column is not here comic_image which is null by default, when we need, will add it.
+        }
+
+
+def as_article(article) -> Article:
+    """Pass Articles through; convert raw dicts with Article.from_dict."""
+    return article if isinstance(article, Article) else Article.from_dict(article)
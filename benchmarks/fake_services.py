@@ -0,0 +1,108 @@
+import gzip
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from synthetic import gnews_articles
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+class FakeServices:
+    """
+    Local stand-in for the RSS feeds and the GNews API on 127.0.0.1.
+      /feeds/<n>.rss, /feeds/<n>.atom   → the recorded fixtures
+      /gnews/search, /gnews/top-headlines → GNews-shaped JSON
+    Every response waits latency_ms ± jitter_ms and fails with a 503 at
+    `failure_rate`, drawn from a seeded RNG. Bodies are gzipped when asked.
+    """
+
+    def __init__(self, latency_ms=0, jitter_ms=0, failure_rate=0.0, seed=0, fixtures_dir=FIXTURES_DIR):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.fixtures = {}
+        for kind in ("rss", "atom"):
+            with open(os.path.join(fixtures_dir, f"sample_{kind}.xml"), "rb") as f:
+                self.fixtures[kind] = f.read()
+        self.server = None
+        self.thread = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def feed_urls(self, count):
+        """`count` distinct feed URLs, alternating RSS and Atom."""
+        return [f"{self.base_url}/feeds/{i}.{'rss' if i % 2 == 0 else 'atom'}" for i in range(count)]
+
+    def _draw(self):
+        with self.rng_lock:
+            delay = max(0.0, self.latency_ms + self.rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+            return delay, self.rng.random() < self.failure_rate
+
+    def _respond(self, path, query):
+        """(status, content type, body) for one request."""
+        if path.startswith("/feeds/"):
+            kind = path.rsplit(".", 1)[-1]
+            if kind in self.fixtures:
+                content_type = "application/rss+xml" if kind == "rss" else "application/atom+xml"
+                return 200, content_type, self.fixtures[kind]
+        if path in ("/gnews/search", "/gnews/top-headlines"):
+            count = int(query.get("max", ["10"])[0])
+            seed = sum(map(ord, query.get("q", query.get("category", [""]))[0]))
+            body = {"totalArticles": count, "articles": gnews_articles(count, seed=seed)}
+            return 200, "application/json", json.dumps(body).encode("utf-8")
+        return 404, "text/plain", b"not found"
+
+    def start(self):
+        services = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                delay, fail = services._draw()
+                time.sleep(delay)
+                url = urlparse(self.path)
+                if fail:
+                    status, content_type, body = 503, "text/plain", b"unavailable"
+                else:
+                    status, content_type, body = services._respond(url.path, parse_qs(url.query))
+
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                if "gzip" in self.headers.get("Accept-Encoding", ""):
+                    body = gzip.compress(body)
+                    self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
@@ -0,0 +1,273 @@
+"""
+Benchmarks for the pipeline hot paths, with no live feeds, GNews or Atlas.
+
+    python benchmarks/run_benchmarks.py                       # 100 / 1k / 10k articles
+    python benchmarks/run_benchmarks.py --sizes 100,1000,10000,100000 --repeat 1 --json bench.json
+    python benchmarks/run_benchmarks.py --compare bench.json  # flag slowdowns vs a saved run
+    python benchmarks/run_benchmarks.py --mongo mongomock     # also time save_articles
+
+Corpora come from synthetic.generate_articles (seeded, with tunable
+duplicate / near-duplicate rates, over a Zipf-sampled 50k-word vocabulary
+so unrelated stories barely overlap and dedup cost stays linear). RSS and GNews fetches run against
+fake_services.FakeServices on localhost. The Mongo target is optional:
+"mongomock" (pip install mongomock) or a mongodb:// URI for a local server.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# keep the fetchers' caches, health records, seen marks and quota out of the repo's .cache
+_STATE_DIR = tempfile.mkdtemp(prefix="news-bench-")
+for _name, _file in (("RSS_CACHE_PATH", "rss_feed_cache.json"), ("FEED_HEALTH_PATH", "feed_health.json"),
+                     ("RSS_SEEN_PATH", "rss_seen.json"), ("GNEWS_QUOTA_PATH", "gnews_quota.json")):
+    os.environ[_name] = os.path.join(_STATE_DIR, _file)
+os.environ.setdefault("GNEWS_API_KEY", "benchmark")
+os.environ.setdefault("PIPELINE_METRICS", "1")
+
+from fake_services import FakeServices  # noqa: E402
+from synthetic import generate_articles  # noqa: E402
+
+import pipeline_metrics  # noqa: E402
+from article import Article  # noqa: E402
+from feed_health import percentile  # noqa: E402
+from filter_update_news import NewsDeduper, calculate_score, calculate_scores, process_news_file  # noqa: E402
+
+DEFAULT_SIZES = "100,1000,10000"
+SLOWDOWN_THRESHOLD = 1.2   # --compare flags results this much slower than the baseline
+
+
+# --- Helpers ---
+def fresh(corpus):
+    return [Article.from_dict(raw) for raw in corpus]
+
+
+def timed(fn, repeat):
+    """Best wall time of `repeat` runs (seconds) and the last result."""
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def peak_memory_mb(fn):
+    """Peak Python heap allocated while `fn` runs."""
+    tracemalloc.start()
+    try:
+        fn()
+        return round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1)
+    finally:
+        tracemalloc.stop()
+
+
+def latency_stats(samples_us):
+    return {
+        "p50_us": percentile(samples_us, 50),
+        "p95_us": percentile(samples_us, 95),
+        "p99_us": percentile(samples_us, 99),
+    }
+
+
+def result_row(bench, size, seconds, **extra):
+    return {
+        "bench": bench,
+        "size": size,
+        "seconds": round(seconds, 4),
+        "per_second": round(size / seconds, 1) if seconds else None,
+        **extra,
+    }
+
+
+# --- CPU Benchmarks ---
+def bench_process(corpus, repeat, memory):
+    size = len(corpus)
+    seconds, (_, news_map) = timed(lambda: process_news_file(fresh(corpus)), repeat)
+    peak = peak_memory_mb(lambda: process_news_file(fresh(corpus))) if memory else None
+    return result_row("process_news_file", size, seconds, clusters=len(news_map), peak_mb=peak)
+
+
+def bench_dedup_add(corpus):
+    """Per-article latency of the streaming path (NewsDeduper.add)."""
+    deduper = NewsDeduper()
+    samples = []
+    started = time.perf_counter()
+    for article in fresh(corpus):
+        t = time.perf_counter_ns()
+        deduper.add(article)
+        samples.append((time.perf_counter_ns() - t) / 1000)
+    return result_row("NewsDeduper.add", len(corpus), time.perf_counter() - started, **latency_stats(samples))
+
+
+def bench_score(corpus, repeat):
+    """calculate_score per article (latency) and calculate_scores over the batch (throughput)."""
+    deduper = NewsDeduper()
+    pairs = []
+    for article in fresh(corpus):
+        article, entry = deduper.assign(article)
+        pairs.append((article, dict(entry)))
+
+    samples = []
+    for article, entry in pairs:
+        t = time.perf_counter_ns()
+        calculate_score(article, entry)
+        samples.append((time.perf_counter_ns() - t) / 1000)
+    rows = [result_row("calculate_score", len(pairs), sum(samples) / 1e6, **latency_stats(samples))]
+
+    articles = [article for article, _ in pairs]
+    entries = [entry for _, entry in pairs]
+    seconds, _ = timed(lambda: calculate_scores(articles, entries), repeat)
+    rows.append(result_row("calculate_scores", len(pairs), seconds))
+    return rows
+
+
+# --- I/O Benchmarks ---
+def _http_latency(run):
+    latencies = [ms for values in run.http.values() for ms in values]
+    return {"requests": len(latencies), "http_p50_ms": percentile(latencies, 50),
+            "http_p95_ms": percentile(latencies, 95)}
+
+
+def bench_rss(services, feeds):
+    import rss_feed_outof_india as rss
+
+    urls = services.feed_urls(feeds)
+    rss.RSS_FEEDS = {"general": urls}
+    run = pipeline_metrics.start_run(True)
+    started = time.perf_counter()
+    items, _ = rss.fetch_rss_news(use_cache=False, use_health=False)
+    seconds = time.perf_counter() - started
+    pipeline_metrics.end_run()
+    return result_row("fetch_rss_news", len(items), seconds, feeds=feeds, **_http_latency(run))
+
+
+def bench_gnews(services, rate):
+    import gnews_fetching as gnews
+
+    gnews.GNEWS_BASE_URL = f"{services.base_url}/gnews"
+    gnews.GNEWS_RATE_PER_SEC = rate
+    gnews.GNEWS_BURST = gnews.GNEWS_MAX_WORKERS
+    run = pipeline_metrics.start_run(True)
+    started = time.perf_counter()
+    news, _ = gnews.collect_news(use_quota=False)
+    seconds = time.perf_counter() - started
+    pipeline_metrics.end_run()
+    return result_row("collect_news", sum(len(v) for v in news.values()), seconds, **_http_latency(run))
+
+
+def mongo_collection(target):
+    if target == "mongomock":
+        import mongomock
+        return mongomock.MongoClient()["news_bench"]["news"]
+    from pymongo import MongoClient
+    return MongoClient(target)["news_bench"]["news"]
+
+
+def bench_save(corpus, target, memory):
+    """save_articles into an empty collection, then again unchanged (the contentHash skip path)."""
+    import save_to_mongo
+
+    collection = mongo_collection(target)
+    collection.drop()
+    articles, _ = process_news_file(fresh(corpus))
+
+    rows = []
+    for label in ("save_articles(insert)", "save_articles(unchanged)"):
+        started = time.perf_counter()
+        save_to_mongo.save_articles(articles, collection=collection)
+        rows.append(result_row(label, len(articles), time.perf_counter() - started))
+    if memory:
+        rows[-1]["peak_mb"] = peak_memory_mb(lambda: save_to_mongo.save_articles(articles, collection=collection))
+    collection.drop()
+    return rows
+
+
+# --- Report ---
+def print_table(rows):
+    print(f"{'bench':<26}{'size':>8}{'seconds':>10}{'per sec':>12}{'p50':>10}{'p95':>10}{'peak MB':>9}")
+    for row in rows:
+        p50 = row.get("p50_us", row.get("http_p50_ms"))
+        p95 = row.get("p95_us", row.get("http_p95_ms"))
+        unit = "us" if "p50_us" in row else "ms"
+        print(f"{row['bench']:<26}{row['size']:>8}{row['seconds']:>10.3f}{row['per_second'] or 0:>12.1f}"
+              f"{'-' if p50 is None else f'{p50:.0f}{unit}':>10}{'-' if p95 is None else f'{p95:.0f}{unit}':>10}"
+              f"{'-' if row.get('peak_mb') is None else row['peak_mb']:>9}")
+
+
+def compare(rows, baseline_path):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {(r["bench"], r["size"]): r for r in json.load(f)["results"]}
+    slower = 0
+    for row in rows:
+        base = baseline.get((row["bench"], row["size"]))
+        if not base or not base["seconds"]:
+            continue
+        ratio = row["seconds"] / base["seconds"]
+        if ratio > SLOWDOWN_THRESHOLD:
+            slower += 1
+            print(f"⚠️ {row['bench']} @ {row['size']}: {ratio:.2f}x slower than baseline")
+    print(f"📊 Compared against {baseline_path}: {slower} slowdown(s) over {SLOWDOWN_THRESHOLD}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the news pipeline hot paths offline.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma-separated corpus sizes")
+    parser.add_argument("--dup-rate", type=float, default=0.10)
+    parser.add_argument("--near-dup-rate", type=float, default=0.10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per CPU benchmark (best is kept)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--feeds", type=int, default=26, help="feeds served to fetch_rss_news")
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--jitter-ms", type=float, default=20)
+    parser.add_argument("--failure-rate", type=float, default=0.05)
+    parser.add_argument("--gnews-rate", type=float, default=1000,
+                        help="GNews requests/sec; the live limit is 1, which would only time the sleep")
+    parser.add_argument("--mongo", default=None, help='"mongomock" or a mongodb:// URI to also time save_articles')
+    parser.add_argument("--json", dest="json_path", help="write results to this file")
+    parser.add_argument("--compare", help="baseline JSON from an earlier --json run")
+    args = parser.parse_args()
+
+    memory = not args.no_memory
+    rows = []
+    for size in (int(s) for s in args.sizes.split(",")):
+        corpus = generate_articles(size, args.dup_rate, args.near_dup_rate, seed=args.seed)
+        print(f"⚡ {size} articles...")
+        rows.append(bench_process(corpus, args.repeat, memory))
+        rows.append(bench_dedup_add(corpus))
+        rows.extend(bench_score(corpus, args.repeat))
+        if args.mongo:
+            rows.extend(bench_save(corpus, args.mongo, memory))
+
+    print("📡 Fetching from local fake services...")
+    with FakeServices(args.latency_ms, args.jitter_ms, args.failure_rate, seed=args.seed) as services:
+        rows.append(bench_rss(services, args.feeds))
+        rows.append(bench_gnews(services, args.gnews_rate))
+
+    print_table(rows)
+    print(f"🧠 Process peak RSS: {pipeline_metrics.peak_rss_mb()} MB")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "env": {"python": platform.python_version(), "platform": platform.platform(),
+                        "cpu_count": os.cpu_count()},
+                "args": vars(args),
+                "results": rows,
+            }, f, indent=2)
+        print(f"💾 Results written to {args.json_path}")
+    if args.compare:
+        compare(rows, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import itertools
+import random
+from datetime import datetime, timedelta, timezone
+
+from filter_update_news import KEYWORDS_HIGH, KEYWORDS_MED
+
+# --- Vocabulary ---
+# Real headlines draw on a large vocabulary with a Zipf-shaped frequency, so
+# two unrelated stories share almost no tokens. A small word list would make
+# every pair look half-similar and turn dedup's LSH lookups near-quadratic.
+VOCAB_SIZE = 50000
+ZIPF_EXPONENT = 1.0
+_SYLLABLES = [c + v for c in "bdfghklmnprstvz" for v in "aeiou"]
+
+def _build_vocabulary(size, seed=7):
+    """`size` distinct pronounceable nonsense words; real scoring keywords only appear where injected."""
+    rng = random.Random(seed)
+    words = set(KEYWORDS_HIGH | KEYWORDS_MED)
+    vocab = []
+    while len(vocab) < size:
+        word = "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4)))
+        if word not in words:
+            words.add(word)
+            vocab.append(word)
+    return vocab
+
+VOCABULARY = _build_vocabulary(VOCAB_SIZE)
+_ZIPF_CUM_WEIGHTS = list(itertools.accumulate(1 / rank ** ZIPF_EXPONENT for rank in range(1, VOCAB_SIZE + 1)))
+
+# some scoring keywords and big sources so calculate_score has work to do
+KEYWORDS = [
+    "election", "inflation", "rocket", "launch", "protest", "sensex", "startup",
+    "vaccine", "cyclone", "summit", "crypto", "ipl", "merger", "satellite",
+]
+SOURCES = [
+    "Reuters", "BBC News", "The Hindu", "NDTV", "Times of India", "Local Daily",
+    "Tech Wire", "Sports Desk", "Science Now", "Metro Herald", "Market Watchers",
+]
+CATEGORIES = ["business", "technology", "politics", "entertainment", "sports", "science", "general"]
+
+
+def _words(rng, count):
+    return rng.choices(VOCABULARY, cum_weights=_ZIPF_CUM_WEIGHTS, k=count)
+
+def _sentence(rng, words):
+    tokens = [rng.choice(KEYWORDS) if rng.random() < 0.08 else word for word in _words(rng, words)]
+    return " ".join(tokens).capitalize()
+
+
+def _near_duplicate(rng, text):
+    """Swap one token: keeps token-set Jaccard well above the 0.80 threshold."""
+    tokens = text.split()
+    tokens[rng.randrange(len(tokens))] = _words(rng, 1)[0]
+    return " ".join(tokens)
+
+
+def generate_articles(n, dup_rate=0.10, near_dup_rate=0.10, seed=42, now=None):
+    """
+    `n` raw article dicts in fetcher shape. About `dup_rate` of them repeat
+    an earlier story's title and description under another source/url, and
+    `near_dup_rate` repeat it with one token changed. Same seed, same corpus.
+    """
+    rng = random.Random(seed)
+    now = now or datetime(2026, 1, 1, 12, tzinfo=timezone.utc)
+    stories = []
+    articles = []
+    for i in range(n):
+        roll = rng.random()
+        if stories and roll < dup_rate:
+            title, description = rng.choice(stories)
+        elif stories and roll < dup_rate + near_dup_rate:
+            title, description = rng.choice(stories)
+            if rng.random() < 0.5:
+                title = _near_duplicate(rng, title)
+            else:
+                description = _near_duplicate(rng, description)
+        else:
+            title = _sentence(rng, rng.randint(8, 14))
+            description = _sentence(rng, rng.randint(20, 40))
+            stories.append((title, description))
+
+        category = rng.choice(CATEGORIES)
+        published = now - timedelta(minutes=rng.randint(0, 48 * 60))
+        articles.append({
+            "title": title,
+            "description": description,
+            "author": None,
+            "source": rng.choice(SOURCES),
+            "url": f"https://example.test/{category}/{i}",
+            "image_url": None,
+            "category": category,
+            "tags": [category.capitalize()],
+            "published_at": published.replace(tzinfo=None).isoformat(),
+            "fetched_at": now.isoformat(),
+        })
+    return articles
+
+
+def gnews_articles(count, seed=0, now=None):
+    """Articles in the GNews API response shape."""
+    gnews = []
+    for article in generate_articles(count, dup_rate=0, near_dup_rate=0, seed=seed, now=now):
+        gnews.append({
+            "title": article["title"],
+            "description": article["description"],
+            "url": article["url"],
+            "image": None,
+            "publishedAt": article["published_at"] + "Z",
+            "source": {"name": article["source"], "url": "https://example.test"},
+        })
+    return gnews
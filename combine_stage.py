@@ -1,7 +1,11 @@
 import os
 import json
+import queue
+import threading
 from datetime import datetime, timezone
 
+from article import as_article
+
 # Import your existing fetchers
 from gnews_fetching import  collect_news  # your GNews script
 from rss_feed_outof_india import fetch_rss_news     # your RSS script
@@ -9,8 +13,8 @@ from rss_feed_outof_india import fetch_rss_news     # your RSS script
 
 def combine_news(gnews_data, rss_data):
     """
-    Combine GNews structured data + RSS flat data into a unified flat list.
-    Preserves all keys from original articles.
+    Combine GNews structured data + RSS flat data into a unified flat list
+    of Article records (raw dicts are converted).
     """
     combined = []
 
@@ -18,18 +22,70 @@ def combine_news(gnews_data, rss_data):
     if isinstance(gnews_data, dict):
         for category, articles in gnews_data.items():
             for article in articles:
+                article = as_article(article)
                 # Ensure category field exists
-                article.setdefault("category", category)
+                if article.category is None:
+                    article.category = category
                 combined.append(article)
 
     # Add RSS data (already flat list)
     if isinstance(rss_data, list):
         for article in rss_data:
-            combined.append(article)
+            combined.append(as_article(article))
 
     return combined
 
 
+STREAM_QUEUE_SIZE = 500  # articles buffered between fetchers and the consumer
+
+_DONE = object()
+
+
+def stream_news(*sources, maxsize=STREAM_QUEUE_SIZE):
+    """
+    Streaming counterpart of combine_news: drains each article iterable on
+    its own thread and yields articles in arrival order. The bounded queue
+    applies backpressure so fetchers never run ahead of the consumer by
+    more than `maxsize` articles.
+    """
+    buffer = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+
+    def produce(source):
+        try:
+            for article in source:
+                if stop.is_set():
+                    break
+                buffer.put(article)
+        except Exception as e:
+            buffer.put(e)
+        finally:
+            buffer.put(_DONE)
+
+    threads = [threading.Thread(target=produce, args=(source,), daemon=True) for source in sources]
+    for thread in threads:
+        thread.start()
+
+    remaining = len(threads)
+    try:
+        while remaining:
+            item = buffer.get()
+            if item is _DONE:
+                remaining -= 1
+            elif isinstance(item, Exception):
+                print(f"⚠️ Source failed mid-stream: {item}")
+            else:
+                yield item
+    finally:
+        # unblock producers if the consumer stops early
+        stop.set()
+        while any(thread.is_alive() for thread in threads):
+            try:
+                buffer.get_nowait()
+            except queue.Empty:
+                threading.Event().wait(0.01)
+
+
 # if __name__ == "__main__":
 #     # Step 1: Fetch from GNews
 #     print("📡 Fetching GNews data...")
@@ -0,0 +1,155 @@
+import io
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+# --- Namespaces ---
+ATOM_NS = "http://www.w3.org/2005/Atom"
+MEDIA_NS = "http://search.yahoo.com/mrss/"
+DC_NS = "http://purl.org/dc/elements/1.1/"
+
+_ATOM = f"{{{ATOM_NS}}}"
+_MEDIA_CONTENT = f"{{{MEDIA_NS}}}content"
+_MEDIA_THUMBNAIL = f"{{{MEDIA_NS}}}thumbnail"
+_DC_CREATOR = f"{{{DC_NS}}}creator"
+
+
+# --- Dates ---
+def _to_utc_iso(dt):
+    """Match datetime(*entry.published_parsed[:6]).isoformat() from feedparser."""
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt.replace(microsecond=0).isoformat()
+
+def _rss_date(text):
+    try:
+        return _to_utc_iso(parsedate_to_datetime(text.strip()))
+    except (TypeError, ValueError, IndexError):
+        return None
+
+def _atom_date(text):
+    try:
+        return _to_utc_iso(datetime.fromisoformat(text.strip().replace("Z", "+00:00")))
+    except ValueError:
+        return None
+
+
+# --- Entry Extraction ---
+class _UseFeedparser(Exception):
+    """Raised mid-parse for content only feedparser handles; parse_feed_bytes returns None."""
+
+def _text(elem):
+    return (elem.text or "").strip() if elem is not None else None
+
+def _sanitize(html):
+    """
+    Summaries end up in news.description, so feed HTML goes through
+    feedparser's own sanitizer (scripts, handlers and unsafe tags dropped),
+    as it would on the feedparser path. Plain text is returned as is.
+    _sanitize_html is private to feedparser; if an upgrade moves or changes
+    it, the whole feed goes through feedparser instead.
+    """
+    if not html or "<" not in html:
+        return html
+    try:
+        from feedparser.sanitizer import _sanitize_html
+
+        return _sanitize_html(html, "utf-8", "text/html")
+    except (ImportError, AttributeError, TypeError, ValueError) as e:
+        raise _UseFeedparser() from e
+
+def _media_url(item):
+    for tag in (_MEDIA_CONTENT, _MEDIA_THUMBNAIL):
+        media = item.find(tag)
+        if media is not None and media.get("url"):
+            return media.get("url")
+    return None
+
+def _rss_entry(item):
+    author = _text(item.find("author")) or _text(item.find(_DC_CREATOR))
+    pub_date = _text(item.find("pubDate"))
+    return {
+        "title": _text(item.find("title")),
+        "summary": _sanitize(_text(item.find("description"))) or "",
+        "author": author or "Unknown",
+        "link": _text(item.find("link")) or "",
+        "image_url": _media_url(item),
+        "published_at": _rss_date(pub_date) if pub_date else None,
+    }
+
+def _atom_entry(entry):
+    link = ""
+    for candidate in entry.findall(f"{_ATOM}link"):
+        if candidate.get("rel", "alternate") == "alternate" and candidate.get("href"):
+            link = candidate.get("href")
+            break
+    summary = entry.find(f"{_ATOM}summary")
+    if summary is None:
+        summary = entry.find(f"{_ATOM}content")
+    if summary is not None and summary.get("type") == "xhtml":
+        # the body is child elements, not text; feedparser serializes it
+        raise _UseFeedparser()
+    published = _text(entry.find(f"{_ATOM}published"))
+    return {
+        "title": _text(entry.find(f"{_ATOM}title")),
+        "summary": _sanitize(_text(summary)) or "",
+        "author": _text(entry.find(f"{_ATOM}author/{_ATOM}name")) or "Unknown",
+        "link": link,
+        "image_url": _media_url(entry),
+        "published_at": _atom_date(published) if published else None,
+    }
+
+
+# --- Parser ---
+def parse_feed_bytes(content: bytes, limit: int):
+    """
+    Parse the first `limit` entries of a plain RSS 2.0 or Atom document,
+    stopping as soon as they are read. Returns the same
+    {"source", "entries", "cache_hit"} shape as rss_feed_outof_india's
+    extract_entries, or None for anything it does not recognize (RSS 1.0,
+    malformed XML, ...) so the caller can fall back to feedparser.
+    """
+    kind = None
+    source = None
+    entries = []
+    depth = 0
+    try:
+        for event, elem in ET.iterparse(io.BytesIO(content), events=("start", "end")):
+            if event == "start":
+                depth += 1
+                if depth == 1:
+                    if elem.tag == "rss":
+                        kind = "rss"
+                    elif elem.tag == f"{_ATOM}feed":
+                        kind = "atom"
+                    else:
+                        return None
+                continue
+
+            depth -= 1
+            tag = elem.tag
+            if kind == "rss":
+                if tag == "title" and depth == 2 and source is None:
+                    source = _text(elem)
+                elif tag == "item":
+                    entries.append(_rss_entry(elem))
+                    elem.clear()
+            else:
+                if tag == f"{_ATOM}title" and depth == 1 and source is None:
+                    source = _text(elem)
+                elif tag == f"{_ATOM}entry":
+                    entries.append(_atom_entry(elem))
+                    elem.clear()
+
+            if len(entries) >= limit:
+                break
+    except (ET.ParseError, _UseFeedparser):
+        return None
+
+    if kind is None:
+        return None
+    return {
+        "source": source or "Unknown Source",
+        "entries": entries,
+        "cache_hit": False,
+    }
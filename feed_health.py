@@ -0,0 +1,116 @@
+import json
+import os
+import time
+
+# --- Health store ---
+FEED_HEALTH_PATH = os.getenv("FEED_HEALTH_PATH", ".cache/feed_health.json")
+FEED_HISTORY_SIZE = 20            # recent attempts kept per feed
+
+# --- Circuit breaker ---
+FEED_FAILURE_THRESHOLD = 3        # consecutive failures that open a feed's circuit
+FEED_COOLDOWN_SECONDS = 30 * 60   # wait before the first probe; doubles with each failed probe
+FEED_MAX_COOLDOWN_SECONDS = 24 * 3600
+FEED_PROBE_TIMEOUT = 5
+
+# --- Adaptive timeouts ---
+FEED_DEFAULT_TIMEOUT = 20
+FEED_MIN_TIMEOUT = 5
+FEED_TIMEOUT_FACTOR = 3           # timeout = p95 of successful fetches x factor
+FEED_MIN_SAMPLES = 3
+FEED_RETRIES = 2
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of `values`, or None if empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-pct * len(ordered) // 100))
+    return ordered[int(rank) - 1]
+
+
+class FeedHealth:
+    """
+    Per-feed fetch history persisted between runs. Each record keeps the
+    last FEED_HISTORY_SIZE attempts as [ok, latency_ms] pairs plus the
+    derived success rate, p50/p95 latency and consecutive failures.
+    policy() turns that into a timeout and a circuit state for the next run.
+    """
+
+    def __init__(self, records=None, path=FEED_HEALTH_PATH):
+        self.records = records or {}
+        self.path = path
+
+    @classmethod
+    def load(cls, path=FEED_HEALTH_PATH):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return cls(json.load(f), path)
+        except (OSError, ValueError):
+            return cls(path=path)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.records, f)
+        os.replace(tmp_path, self.path)
+
+    def policy(self, feed_url, now=None):
+        """
+        {"state", "timeout", "retries", "fallback"} for the next fetch.
+        closed: normal fetch with a timeout from the feed's own p95.
+        open: skip; the feed failed recently and its cooldown is running.
+        half_open: cooldown over, one short probe with no feedparser fallback.
+        """
+        record = self.records.get(feed_url)
+        if not record:
+            return {"state": "closed", "timeout": FEED_DEFAULT_TIMEOUT,
+                    "retries": FEED_RETRIES, "fallback": True}
+
+        failures = record["consecutive_failures"]
+        if failures >= FEED_FAILURE_THRESHOLD:
+            cooldown = min(FEED_COOLDOWN_SECONDS * 2 ** (failures - FEED_FAILURE_THRESHOLD),
+                           FEED_MAX_COOLDOWN_SECONDS)
+            now = time.time() if now is None else now
+            if now - record["last_attempt"] < cooldown:
+                return {"state": "open", "timeout": 0, "retries": 0, "fallback": False}
+            return {"state": "half_open", "timeout": FEED_PROBE_TIMEOUT, "retries": 1, "fallback": False}
+
+        timeout = FEED_DEFAULT_TIMEOUT
+        latencies = [latency for ok, latency in record["history"] if ok and latency is not None]
+        if len(latencies) >= FEED_MIN_SAMPLES:
+            p95_seconds = percentile(latencies, 95) / 1000
+            timeout = min(FEED_DEFAULT_TIMEOUT, max(FEED_MIN_TIMEOUT, round(p95_seconds * FEED_TIMEOUT_FACTOR, 1)))
+        return {"state": "closed", "timeout": timeout, "retries": FEED_RETRIES, "fallback": True}
+
+    def record(self, feed_url, ok, latency_ms, now=None):
+        record = self.records.setdefault(feed_url, {"history": [], "consecutive_failures": 0})
+        record["history"] = (record["history"] + [[ok, latency_ms]])[-FEED_HISTORY_SIZE:]
+        record["consecutive_failures"] = 0 if ok else record["consecutive_failures"] + 1
+        record["last_attempt"] = time.time() if now is None else now
+
+        latencies = [latency for good, latency in record["history"] if good and latency is not None]
+        record["success_rate"] = round(sum(1 for good, _ in record["history"] if good) / len(record["history"]), 3)
+        record["p50_ms"] = percentile(latencies, 50)
+        record["p95_ms"] = percentile(latencies, 95)
+
+    def update_from_logs(self, rss_logs, now=None):
+        """
+        Record one run's per-feed rss_logs entries. A feed listed under
+        several categories counts once. Entries without a latency were never
+        attempted (open circuit, or the run deadline hit first) and are left out.
+        A feed served by the feedparser fallback still delivered, so it counts
+        as a success for the circuit; its latency is kept out of the timeout
+        percentiles, since it says nothing about the direct fetch.
+        """
+        seen = set()
+        for log in rss_logs:
+            feed_url = log.get("url")
+            if log.get("type") == "summary" or not feed_url or feed_url in seen:
+                continue
+            seen.add(feed_url)
+            if log.get("latency_ms") is None:
+                continue
+            latency_ms = None if log.get("fallback") else log.get("latency_ms")
+            self.record(feed_url, log.get("error") is None, latency_ms, now)
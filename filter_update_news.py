@@ -3,41 +3,178 @@ import json
 import hashlib
 import re
 import random
+import zlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone
+from functools import lru_cache
+
+from article import Article, as_article
 
 # ---------- Utility Functions ----------
 
+NORMALIZE_CACHE_SIZE = 4096
+
+_NON_ALNUM = re.compile(r'[^a-z0-9\s]')
+# ASCII-only equivalent of _NON_ALNUM.sub for the common case: a translate
+# table deleting every ASCII char the regex would strip
+_ASCII_STRIP = {i: None for i in range(128) if _NON_ALNUM.match(chr(i))}
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
 def normalize_text(text: str) -> str:
-    """Normalize text for hashing and comparison."""
+    """Normalize text for hashing and comparison (memoized, bounded)."""
     text = text.lower()
-    text = re.sub(r'[^a-z0-9\s]', '', text)
+    if text.isascii():
+        text = text.translate(_ASCII_STRIP)
+    else:
+        text = _NON_ALNUM.sub('', text)
     return " ".join(text.split())
 
+_KEYWORD_SPLIT = re.compile(r"[^a-z0-9]+")
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def keyword_text(text: str) -> str:
+    """
+    Lowercase text with punctuation runs turned into single spaces, for
+    keyword matching: "Modi's" -> "modi s", "COVID-19" -> "covid 19".
+    normalize_text deletes punctuation instead ("modis", "covid19"), which
+    suits dedup hashing but glues keywords to their suffixes.
+    """
+    return _KEYWORD_SPLIT.sub(" ", text.lower()).strip()
+
 def md5_hash(text: str) -> str:
     """Generate MD5 hash of normalized text."""
     return hashlib.md5(normalize_text(text).encode()).hexdigest()
 
-def jaccard_similarity(text1: str, text2: str) -> float:
-    """Compute Jaccard similarity between two texts."""
-    set1, set2 = set(normalize_text(text1).split()), set(normalize_text(text2).split())
+def token_jaccard(set1: frozenset, set2: frozenset) -> float:
+    """Jaccard similarity of two precomputed token sets."""
     if not set1 or not set2:
         return 0.0
-    return len(set1 & set2) / len(set1 | set2)
+    inter = len(set1 & set2)
+    return inter / (len(set1) + len(set2) - inter)
 
-# ---------- Data Normalization ----------
+def jaccard_similarity(text1: str, text2: str) -> float:
+    """Compute Jaccard similarity between two texts."""
+    return token_jaccard(frozenset(normalize_text(text1).split()),
+                         frozenset(normalize_text(text2).split()))
+
+def text_features(text: str):
+    """Return (normalized text, frozen token set, md5) computed once per text."""
+    norm = normalize_text(text)
+    return norm, frozenset(norm.split()), hashlib.md5(norm.encode()).hexdigest()
+
+# ---------- Candidate Index (MinHash / LSH) ----------
+
+# 32 bands x 4 rows: pairs at Jaccard 0.8 collide in some band with
+# probability ~1 - 5e-8, so the exact threshold check rarely loses a match.
+LSH_BANDS = 32
+LSH_ROWS = 4
+SHINGLE_SIZE = 1  # 1 = plain tokens, i.e. the same sets jaccard_similarity compares
+
+_MERSENNE_PRIME = (1 << 61) - 1
+
+def shingle(tokens, size: int = SHINGLE_SIZE) -> set:
+    """Return the set of `size`-token shingles of a token list."""
+    if size <= 1:
+        return set(tokens)
+    if len(tokens) <= size:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+class MinHashLSH:
+    """
+    Banded MinHash index over shingled text.
+    Maps a text to the keys of previously inserted texts that are likely to be
+    near-duplicates; callers still verify candidates with an exact check.
+    """
+
+    def __init__(self, bands: int = LSH_BANDS, rows: int = LSH_ROWS,
+                 shingle_size: int = SHINGLE_SIZE, seed: int = 1):
+        rng = random.Random(seed)
+        self.bands = bands
+        self.rows = rows
+        self.shingle_size = shingle_size
+        self._perms = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(bands * rows)
+        ]
+        self._buckets = [{} for _ in range(bands)]
+
+    def signature(self, text: str):
+        """MinHash signature of normalized text, or None if it has no tokens."""
+        grams = shingle(text.split(), self.shingle_size)
+        if not grams:
+            return None
+        hashes = [zlib.crc32(g.encode()) for g in grams]
+        p = _MERSENNE_PRIME
+        return tuple(min([(a * h + b) % p for h in hashes]) for a, b in self._perms)
+
+    def _bands(self, sig):
+        r = self.rows
+        for i in range(self.bands):
+            yield i, sig[i * r:(i + 1) * r]
+
+    def insert(self, key, sig):
+        if sig is None:
+            return
+        for i, band in self._bands(sig):
+            self._buckets[i].setdefault(band, []).append(key)
+
+    def query(self, sig) -> set:
+        if sig is None:
+            return set()
+        found = set()
+        for i, band in self._bands(sig):
+            found.update(self._buckets[i].get(band, ()))
+        return found
+
+# ---------- Process Pool Offload ----------
+
+PROCESS_WORKERS = os.cpu_count() or 1
+# below this many texts, starting workers and pickling results costs more than it saves
+POOL_MIN_TEXTS = 2000
+POOL_CHUNKS_PER_WORKER = 4
+# Workers are started by a forkserver (spawn where that's unavailable), never
+# forked from the pipeline: fork copies the locks fetch threads hold mid-request
+# (imports, logging, sockets) and can deadlock the child.
+POOL_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+def process_pool(workers: int) -> ProcessPoolExecutor:
+    """ProcessPoolExecutor whose workers are safe to start while other threads run."""
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(POOL_START_METHOD))
+
+def _features_chunk(texts, bands, rows, shingle_size):
+    lsh = MinHashLSH(bands, rows, shingle_size)
+    out = []
+    for text in texts:
+        norm, tokens, md5 = text_features(text)
+        out.append((norm, tokens, md5, lsh.signature(norm)))
+    return out
+
+def compute_features(texts, workers: int = 1, bands: int = LSH_BANDS, rows: int = LSH_ROWS,
+                     shingle_size: int = SHINGLE_SIZE):
+    """
+    (norm, tokens, md5, MinHash signature) for each text, in input order.
+    With workers > 1 and enough texts the work is split into contiguous
+    chunks on a process pool; the seeded MinHash makes every worker's
+    signatures identical to the in-process ones.
+    """
+    texts = list(texts)
+    if workers <= 1 or len(texts) < POOL_MIN_TEXTS:
+        return _features_chunk(texts, bands, rows, shingle_size)
 
-def normalize_article(article):
-    """Preserve all original keys and ensure required fields exist."""
-    normalized = dict(article)  # copy everything
+    size = -(-len(texts) // (workers * POOL_CHUNKS_PER_WORKER))
+    chunks = [texts[i:i + size] for i in range(0, len(texts), size)]
+    n = len(chunks)
+    with process_pool(workers) as pool:
+        parts = pool.map(_features_chunk, chunks, [bands] * n, [rows] * n, [shingle_size] * n)
+        return [features for part in parts for features in part]
 
-    normalized.setdefault("title", "")
-    normalized.setdefault("description", article.get("summary", ""))
-    normalized.setdefault("source", article.get("source", "") or article.get("publisher", ""))
-    normalized.setdefault("published_at", article.get("published", ""))
-    if "fetched_at" not in normalized or not normalized["fetched_at"]:
-        normalized["fetched_at"] = article.get("created_at", "")
+# ---------- Data Normalization ----------
 
-    return normalized
+def normalize_article(article) -> Article:
+    """Return the article as an Article, filling required fields from their fallbacks."""
+    return as_article(article)
 
 # ---------- Keywords ----------
 
@@ -59,50 +196,173 @@ KEYWORDS_MED = {
 
 BIG_SOURCES = ["reuters","bbc","times of india","cnn","the hindu","ndtv","indian express","hindustan times"]
 
+class KeywordMatcher:
+    """
+    Whole-word matcher for the scoring keyword sets, compiled once.
+    scan() returns every matched keyword grouped by set ("high"/"med") in a
+    single pass, so "ai" no longer matches inside "said" or "oil" in "soil".
+    """
+
+    def __init__(self, keyword_sets: dict, sources):
+        self.sets = {name: frozenset(words) for name, words in keyword_sets.items()}
+        words = set().union(*self.sets.values())
+        self.single = frozenset(w for w in words if " " not in w)
+        self.multi = frozenset(w for w in words if " " in w)
+        self.pattern = self._compile(words)
+        self.multi_pattern = self._compile(self.multi)
+        # a multi-word keyword can only match if its first word is a token
+        self.multi_heads = frozenset(w.split()[0] for w in self.multi)
+        self.source_pattern = self._compile(sources)
+
+    @staticmethod
+    def _compile(words):
+        if not words:
+            return re.compile(r"(?!)")
+        alternation = "|".join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+        return re.compile(rf"\b(?:{alternation})\b")
+
+    def _group(self, found) -> dict:
+        return {name: sorted(found & words) for name, words in self.sets.items()}
+
+    def scan(self, text: str, tokens=None) -> dict:
+        """
+        Keywords in `text` (a keyword_text() string), grouped by set. Passing
+        the text's token set lets single words be matched by set
+        intersection, which is the same as the word-boundary regex there.
+        """
+        if tokens is None:
+            return self._group(set(self.pattern.findall(text)))
+        found = self.single & tokens
+        if not self.multi_heads.isdisjoint(tokens):
+            found = found | set(self.multi_pattern.findall(text))
+        return self._group(found)
+
+    def scan_article(self, article) -> dict:
+        """scan() over an article's title and description."""
+        text = keyword_text(f"{article.title} {article.description}")
+        return self.scan(text, frozenset(text.split()))
+
+    def match_source(self, source: str):
+        """The big source named in `source`, or None."""
+        m = self.source_pattern.search(source.lower())
+        return m.group(0) if m else None
+
+KEYWORD_MATCHER = KeywordMatcher({"high": KEYWORDS_HIGH, "med": KEYWORDS_MED}, BIG_SOURCES)
+
 # ---------- Scoring ----------
 
-def calculate_score(article, entry):
-    score = 0
-    source = article.get("source", "").lower()
-    score += 20 if any(big in source for big in BIG_SOURCES) else 10
+def calculate_score(article, entry, matches=None):
+    """Score one article against its cluster entry: a one-row score_columns call."""
+    return score_columns(
+        [article],
+        [len(entry["sources"])],
+        [entry["first_seen"]],
+        [entry["last_seen"]],
+        matches=None if matches is None else [matches],
+    )[0]
 
-    text = normalize_text(article.get("title","") + " " + article.get("description",""))
-    if any(k in text for k in KEYWORDS_HIGH):
-        score += 20
-    if any(k in text for k in KEYWORDS_MED):
-        score += 10
+# ---------- Batch Scoring ----------
 
-    pub_time = article.get("published_at")
-    if pub_time:
-        try:
-            pub_dt = datetime.strptime(pub_time.split(".")[0], "%Y-%m-%dT%H:%M:%S").replace(tzinfo=timezone.utc)
-            now = datetime.now(timezone.utc)
-            diff_hours = (now - pub_dt).total_seconds() / 3600
-            if diff_hours < 3:
-                score += 30
-            elif diff_hours < 12:
-                score += 15
-            elif diff_hours > 24:
-                score -= 10
-        except:
-            pass
-
-    num_sources = len(entry["sources"])
-    if num_sources > 1:
-        score += min((num_sources - 1) * 15, 50)
-
-    if entry["first_seen"] and entry["last_seen"]:
-        try:
-            fmt = "%Y-%m-%dT%H:%M:%S"
-            first_dt = datetime.strptime(entry["first_seen"].split(".")[0], fmt)
-            last_dt = datetime.strptime(entry["last_seen"].split(".")[0], fmt)
-            diff_min = (last_dt - first_dt).total_seconds() / 60
-            if diff_min >= 30:
-                score += 10
-        except:
-            pass
+_TIMESTAMP_FMT = "%Y-%m-%dT%H:%M:%S"
+_TIMESTAMP_RE = re.compile(r"[0-9]{4}-[0-9]{2}-[0-9]{2}T[0-9]{2}:[0-9]{2}:[0-9]{2}")
 
-    return min(100, int(score / 140 * 100))
+def parse_timestamps(values) -> dict:
+    """
+    Parse each distinct timestamp once as strptime of the part before "."
+    would, mapping failures to None.
+    """
+    parsed = {}
+    for value in values:
+        if value in parsed or not value:
+            continue
+        try:
+            head = value.split(".")[0]
+            if not head[-1:].isdigit():
+                # the format ends in %S, so strptime would reject this anyway
+                parsed[value] = None
+            elif _TIMESTAMP_RE.fullmatch(head):
+                parsed[value] = datetime.fromisoformat(head)
+            else:
+                parsed[value] = datetime.strptime(head, _TIMESTAMP_FMT)
+        except Exception:
+            parsed[value] = None
+    return parsed
+
+def score_columns(articles, num_sources, first_seen, last_seen, now=None, matches=None):
+    """
+    The article scorer, run over a whole batch column by column: one `now`
+    for the batch, each distinct timestamp and source checked once.
+    calculate_score is the one-row form.
+    `num_sources`, `first_seen` and `last_seen` are the cluster state each
+    article was scored against. Keyword hits come from `matches`, else the
+    article's matched_keywords (set by NewsDeduper.assign), else a scan.
+    """
+    now = (now or datetime.now(timezone.utc)).astimezone(timezone.utc).replace(tzinfo=None)
+    n = len(articles)
+    scores = [0] * n
+
+    # source component
+    source_points = {}
+    for i, article in enumerate(articles):
+        source = article.source
+        points = source_points.get(source)
+        if points is None:
+            points = source_points[source] = 20 if KEYWORD_MATCHER.match_source(source) else 10
+        scores[i] += points
+
+    # keyword component
+    if matches is None:
+        matches = [
+            article.matched_keywords if article.matched_keywords is not None
+            else KEYWORD_MATCHER.scan_article(article)
+            for article in articles
+        ]
+    for i, found in enumerate(matches):
+        if found["high"]:
+            scores[i] += 20
+        if found["med"]:
+            scores[i] += 10
+
+    # recency component
+    pub_times = [article.published_at for article in articles]
+    parsed = parse_timestamps(pub_times)
+    for i, pub_time in enumerate(pub_times):
+        pub_dt = parsed.get(pub_time) if pub_time else None
+        if pub_dt is None:
+            continue
+        diff_hours = (now - pub_dt).total_seconds() / 3600
+        if diff_hours < 3:
+            scores[i] += 30
+        elif diff_hours < 12:
+            scores[i] += 15
+        elif diff_hours > 24:
+            scores[i] -= 10
+
+    # multi-source component
+    for i, count in enumerate(num_sources):
+        if count > 1:
+            scores[i] += min((count - 1) * 15, 50)
+
+    # persistence component
+    parsed = parse_timestamps(first_seen + last_seen)
+    for i in range(n):
+        if first_seen[i] and last_seen[i]:
+            first_dt, last_dt = parsed[first_seen[i]], parsed[last_seen[i]]
+            if first_dt is not None and last_dt is not None:
+                if (last_dt - first_dt).total_seconds() / 60 >= 30:
+                    scores[i] += 10
+
+    return [min(100, int(score / 140 * 100)) for score in scores]
+
+def calculate_scores(articles, entries, now=None):
+    """Batch form of calculate_score for parallel lists of articles and cluster entries."""
+    return score_columns(
+        articles,
+        [len(entry["sources"]) for entry in entries],
+        [entry["first_seen"] for entry in entries],
+        [entry["last_seen"] for entry in entries],
+        now=now,
+    )
 
 def classify_hotness(score):
     if score >= 70:
@@ -116,16 +376,157 @@ def classify_hotness(score):
 
 # ---------- Main Processing ----------
 
-def get_hash(article: dict) -> str:
-    base = f"{article.get('url','')}_{article.get('source','')}_{article.get('published_at','')}_{article.get('title','')}"
+# Precomputed per-cluster features that never leave process_news_file
+_ENTRY_RUNTIME_FIELDS = ("norm", "tokens")
+
+def get_hash(article: Article) -> str:
+    base = f"{article.url}_{article.source}_{article.published_at}_{article.title}"
     return hashlib.md5(base.encode("utf-8")).hexdigest()
 
-def process_news_file(articles, jaccard_threshold: float = 0.80):
+class NewsDeduper:
+    """
+    Incremental form of process_news_file: feed articles one at a time with
+    add() and read the cluster map with news_map() at any point.
+    """
+
+    def __init__(self, jaccard_threshold: float = 0.80,
+                 lsh_bands: int = LSH_BANDS, lsh_rows: int = LSH_ROWS,
+                 shingle_size: int = SHINGLE_SIZE):
+        self.jaccard_threshold = jaccard_threshold
+        self.clusters = {}
+        self.lsh = MinHashLSH(lsh_bands, lsh_rows, shingle_size)
+        self.position = {}  # cluster key -> insertion order, to keep first-match semantics
+        self.changed = set()  # cluster keys touched by add() since creation
+
+    def compute_features(self, texts, workers: int = 1):
+        """compute_features with this deduper's LSH settings."""
+        lsh = self.lsh
+        return compute_features(texts, workers, lsh.bands, lsh.rows, lsh.shingle_size)
+
+    def seed(self, clusters, workers: int = 1):
+        """
+        Warm the index with clusters from earlier runs (dicts with md5, text,
+        sources, article_ids, first_seen, last_seen). Seeded clusters match
+        before any cluster created in this run and are not marked changed.
+        """
+        clusters = list(clusters)
+        texts = [cluster.get("text") or "" for cluster in clusters]
+        for cluster, text, features in zip(clusters, texts, self.compute_features(texts, workers)):
+            key = cluster["md5"]
+            if key in self.clusters:
+                continue
+            norm, tokens, _, sig = features
+            self.clusters[key] = {
+                "md5": key,
+                "text": text,
+                "norm": norm,
+                "tokens": tokens,
+                "sources": set(cluster.get("sources") or []),
+                "article_ids": list(cluster.get("article_ids") or []),
+                "first_seen": cluster.get("first_seen") or "",
+                "last_seen": cluster.get("last_seen") or "",
+            }
+            self.position[key] = len(self.position)
+            self.lsh.insert(key, sig)
+
+    def _match(self, strict_id, tokens, sig):
+        candidates = self.lsh.query(sig)
+        if strict_id in self.clusters:
+            candidates.add(strict_id)
+
+        for nid in sorted(candidates, key=self.position.__getitem__):
+            entry = self.clusters[nid]
+            if strict_id == entry["md5"] or token_jaccard(tokens, entry["tokens"]) >= self.jaccard_threshold:
+                return nid
+        return None
+
+    def assign(self, raw_article, features=None):
+        """
+        Normalize and cluster one article without scoring it. Returns the
+        article and its cluster entry; the entry keeps changing as later
+        articles join, so snapshot it if scoring is deferred. `features` is
+        the article's compute_features() tuple when it was precomputed.
+        """
+        article = normalize_article(raw_article)
+        article_id = get_hash(article)
+        article.article_id = article_id
+        if article.matched_keywords is None:
+            # a text feature like the dedup tokens: extracted once, read by the scorer
+            article.matched_keywords = KEYWORD_MATCHER.scan_article(article)
+
+        title, desc = article.title, article.description
+        core_text = f"{title} {desc}"
+        if features is None:
+            norm, tokens, strict_id = text_features(core_text)
+            sig = self.lsh.signature(norm)
+        else:
+            norm, tokens, strict_id, sig = features
+
+        matched_id = self._match(strict_id, tokens, sig)
+
+        if matched_id:  # duplicate
+            entry = self.clusters[matched_id]
+            entry["sources"].add(article.source)
+            entry["article_ids"].append(article_id)
+            last_seen = article.fetched_at
+            if last_seen and last_seen > entry["last_seen"]:
+                entry["last_seen"] = last_seen
+        else:  # new
+            entry = {
+                "md5": strict_id,
+                "text": core_text,
+                "norm": norm,
+                "tokens": tokens,
+                "sources": {article.source},
+                "article_ids": [article_id],
+                "first_seen": article.fetched_at,
+                "last_seen": article.fetched_at,
+            }
+            self.clusters[strict_id] = entry
+            self.position[strict_id] = len(self.position)
+            self.lsh.insert(strict_id, sig)
+        self.changed.add(entry["md5"])
+        return article, entry
+
+    def add(self, raw_article):
+        """Normalize, cluster and score one article; returns the scored copy."""
+        article, entry = self.assign(raw_article)
+        score = calculate_score(article, entry)
+        article.big_source = KEYWORD_MATCHER.match_source(article.source)
+        article.score = score
+        article.hotness = classify_hotness(score)
+        article.popularity_score = random.randint(1, 10)
+        return article
+
+    def news_map(self, changed_only: bool = False):
+        """Convert sets → lists, dropping the in-memory text features."""
+        return {
+            k: {
+                **{f: val for f, val in v.items() if f not in _ENTRY_RUNTIME_FIELDS},
+                "sources": list(v["sources"]),
+                "count": len(v["article_ids"])
+            }
+            for k, v in self.clusters.items()
+            if not changed_only or k in self.changed
+        }
+
+
+def process_news_file(articles, jaccard_threshold: float = 0.80,
+                      lsh_bands: int = LSH_BANDS, lsh_rows: int = LSH_ROWS,
+                      shingle_size: int = SHINGLE_SIZE, history=None, workers: int = 1):
     """
     Takes list/dict of articles, returns (updated_articles, news_map) in memory.
+    Only clusters returned by the LSH index (plus an exact md5 hit) are checked
+    against `jaccard_threshold`, so dedup is roughly linear in the batch size.
+    `history` seeds clusters from earlier runs; news_map then holds only the
+    clusters this batch created or extended.
+    With `workers` > 1, text features and MinHash signatures are computed on
+    a process pool; cluster assignment still runs in input order, so the
+    result is the same for any worker count.
     """
-    news_map = {}
-    updated_articles = []
+    deduper = NewsDeduper(jaccard_threshold, lsh_bands, lsh_rows, shingle_size)
+    if history:
+        deduper.seed(history, workers)
 
     # Handle dict of categories vs flat list
     if isinstance(articles, dict):
@@ -133,56 +534,25 @@ def process_news_file(articles, jaccard_threshold: float = 0.80):
     else:
         categories = [("general", articles)]
 
-    for category, items in categories:
-        for idx, raw_article in enumerate(items):
-            article = normalize_article(raw_article)
-            article_id = get_hash(article)
-            article["article_id"] = article_id
-
-            title, desc = article["title"], article["description"]
-            core_text = f"{title} {desc}"
-            strict_id = md5_hash(core_text)
-
-            matched_id = None
-            for nid, entry in news_map.items():
-                if strict_id == entry["md5"] or jaccard_similarity(core_text, entry["text"]) >= jaccard_threshold:
-                    matched_id = nid
-                    break
-
-            if matched_id:  # duplicate
-                entry = news_map[matched_id]
-                entry["sources"].add(article.get("source", ""))
-                entry["article_ids"].append(article_id)
-                last_seen = article.get("fetched_at")
-                if last_seen and last_seen > entry["last_seen"]:
-                    entry["last_seen"] = last_seen
-                score = calculate_score(article, entry)
-            else:  # new
-                news_map[strict_id] = {
-                    "md5": strict_id,
-                    "text": core_text,
-                    "sources": {article.get("source", "")},
-                    "article_ids": [article_id],
-                    "first_seen": article.get("fetched_at", ""),
-                    "last_seen": article.get("fetched_at", ""),
-                }
-                entry = news_map[strict_id]
-                score = calculate_score(article, entry)
-
-            article["score"] = score
-            article["hotness"] = classify_hotness(score)
-            article["popularity_score"] = random.randint(1, 10)
-
-            updated_articles.append(article)
-
-    # Convert sets → lists in news_map
-    news_map_clean = {
-        k: {
-            **v,
-            "sources": list(v["sources"]),
-            "count": len(v["article_ids"])
-        }
-        for k, v in news_map.items()
-    }
+    normalized = [normalize_article(raw_article) for _, items in categories for raw_article in items]
+    features = deduper.compute_features(
+        (f"{article.title} {article.description}" for article in normalized), workers)
 
-    return updated_articles, news_map_clean
+    updated_articles = []
+    num_sources, first_seen, last_seen = [], [], []
+    for article, article_features in zip(normalized, features):
+        article, entry = deduper.assign(article, article_features)
+        updated_articles.append(article)
+        # cluster state as of this article, as the per-article scorer saw it
+        num_sources.append(len(entry["sources"]))
+        first_seen.append(entry["first_seen"])
+        last_seen.append(entry["last_seen"])
+
+    scores = score_columns(updated_articles, num_sources, first_seen, last_seen)
+    for article, score in zip(updated_articles, scores):
+        article.big_source = KEYWORD_MATCHER.match_source(article.source)
+        article.score = score
+        article.hotness = classify_hotness(score)
+        article.popularity_score = random.randint(1, 10)
+
+    return updated_articles, deduper.news_map(changed_only=True)
@@ -1,12 +1,21 @@
-import requests
+import argparse
+import json
 import math
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
 from dotenv import load_dotenv
 import os
 import time
+
+from article import Article
+from http_client import HttpClient, default_client
+import pipeline_metrics
+from pipeline_profiler import PROFILE_DEFAULT_DIR, profiler_from
 # --- Load env ---
 load_dotenv()
 API_KEY = os.getenv("GNEWS_API_KEY")
+GNEWS_BASE_URL = os.getenv("GNEWS_BASE_URL", "https://gnews.io/api/v4")
 
 # Categories available in GNews
 CATEGORIES = ["business", "technology", "politics", "entertainment",
@@ -19,12 +28,74 @@ IND_PER_REQUEST_RATIO = 0.8
 DAILY_MAX_REQUESTS = 10
 ARTICLES_PER_REQUEST = 10
 
-TODAY = datetime.now(timezone.utc).strftime("%Y-%m-%d")
 
+def utc_today():
+    """Today's UTC date as YYYY-MM-DD, read per call so long-lived imports don't go stale."""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+
+# --- Rate limiting & quota ---
+GNEWS_RATE_PER_SEC = float(os.getenv("GNEWS_RATE_PER_SEC", "1"))  # API rate limit
+GNEWS_BURST = int(os.getenv("GNEWS_BURST", "1"))
+GNEWS_MAX_WORKERS = 4
+GNEWS_DAILY_QUOTA = int(os.getenv("GNEWS_DAILY_QUOTA", "100"))  # requests per UTC day
+GNEWS_QUOTA_PATH = os.getenv("GNEWS_QUOTA_PATH", ".cache/gnews_quota.json")
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, up to `capacity`."""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
 
-def fetch_news(endpoint, params, category, country, logs):
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_for = (1 - self.tokens) / self.rate
+            time.sleep(wait_for)
+
+
+def reserve_quota(requested, day=None, path=GNEWS_QUOTA_PATH, daily_quota=GNEWS_DAILY_QUOTA):
+    """
+    Reserve up to `requested` calls from today's budget in the local quota
+    store, before any are made. Returns how many were granted.
+    """
+    day = day or utc_today()
     try:
-        response = requests.get(endpoint, params=params, timeout=10)
+        with open(path, "r", encoding="utf-8") as f:
+            usage = json.load(f)
+    except (OSError, ValueError):
+        usage = {}
+
+    used = usage.get(day, 0)
+    granted = max(0, min(requested, daily_quota - used))
+    # only today's counter matters; drop older days
+    usage = {day: used + granted}
+
+    # write-then-rename: a run killed mid-write must not leave invalid JSON,
+    # which would load as {} and hand out the day's budget again
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(usage, f)
+    os.replace(tmp_path, path)
+    return granted
+
+
+
+def fetch_news(endpoint, params, category, country, logs, client=None):
+    try:
+        response = (client or default_client()).get(endpoint, params=params, timeout=10)
         data = response.json()
         if response.status_code != 200 or "articles" not in data:
             logs.append({
@@ -55,20 +126,20 @@ def fetch_news(endpoint, params, category, country, logs):
             source = entry.get("source", {}).get("name") if entry.get("source") else None
             image_url = entry.get("image")
 
-            news_item = {
-                "title": entry.get("title") or None,
-                "description": description or None,
-                "author": entry.get("author"),
-                "source": source,
-                "url": entry.get("url"),
-                "image_url": image_url,
-                "category": category,
-                "tags": [category.capitalize()],
-                "impact_score": None,
-                "popularity_score": None,
-                "published_at": entry.get("publishedAt"),
-                "fetched_at": datetime.now(timezone.utc).isoformat()
-            }
+            news_item = Article(
+                title=entry.get("title") or None,
+                description=description or None,
+                author=entry.get("author"),
+                source=source,
+                url=entry.get("url"),
+                image_url=image_url,
+                category=category,
+                tags=[category.capitalize()],
+                impact_score=None,
+                popularity_score=None,
+                published_at=entry.get("publishedAt"),
+                fetched_at=datetime.now(timezone.utc).isoformat()
+            )
             news_items.append(news_item)
 
         return news_items
@@ -86,8 +157,8 @@ def fetch_news(endpoint, params, category, country, logs):
         return []
 
 
-def fetch_category_news(category, country=None, is_top=False, logs=None):
-    endpoint = "https://gnews.io/api/v4/top-headlines" if is_top else "https://gnews.io/api/v4/search"
+def fetch_category_news(category, country=None, is_top=False, logs=None, client=None):
+    endpoint = f"{GNEWS_BASE_URL}/top-headlines" if is_top else f"{GNEWS_BASE_URL}/search"
     params = {
         "token": API_KEY,
         "lang": "en",
@@ -99,35 +170,134 @@ def fetch_category_news(category, country=None, is_top=False, logs=None):
             params["country"] = country
     else:
         params["q"] = category
-        params["from"] = TODAY
-        params["to"] = TODAY
+        today = utc_today()
+        params["from"] = today
+        params["to"] = today
         if country:
             params["country"] = country
-    return fetch_news(endpoint, params, category, country, logs)
+    return fetch_news(endpoint, params, category, country, logs, client=client)
 
 
-def collect_news():
-    all_news = {cat: [] for cat in CATEGORIES}
-    logs = []
-
+def plan_requests():
+    """(category, country) for each of the run's DAILY_MAX_REQUESTS calls."""
     india_requests = math.floor(DAILY_MAX_REQUESTS * IND_PER_REQUEST_RATIO)
     global_requests = DAILY_MAX_REQUESTS - india_requests
 
-    for i in range(india_requests):
-        cat = CATEGORIES[i % len(CATEGORIES)]
-        all_news[cat].extend(fetch_category_news(cat, PRIMARY_COUNTRY, is_top=False, logs=logs))
-        time.sleep(1) 
+    planned = [(CATEGORIES[i % len(CATEGORIES)], PRIMARY_COUNTRY) for i in range(india_requests)]
+    planned += [
+        (CATEGORIES[i % len(CATEGORIES)], GLOBAL_COUNTRIES[i % len(GLOBAL_COUNTRIES)])
+        for i in range(global_requests)
+    ]
+    return planned
 
-    for i in range(global_requests):
-        cat = CATEGORIES[i % len(CATEGORIES)]
-        country = GLOBAL_COUNTRIES[i % len(GLOBAL_COUNTRIES)]
-        all_news[cat].extend(fetch_category_news(cat, country, is_top=False, logs=logs))
-        time.sleep(1)
+
+def _reserve_planned(planned, logs, use_quota=True):
+    """Trim the plan to today's remaining quota, logging the calls dropped."""
+    allowed = reserve_quota(len(planned)) if use_quota else len(planned)
+    if allowed < len(planned):
+        print(f"⚠️ GNews daily quota reached: running {allowed}/{len(planned)} requests")
+    for cat, country in planned[allowed:]:
+        logs.append({
+            "source": "gnews",
+            "category": cat,
+            "country": country,
+            "articles_count": 0,
+            "params": None,
+            "error": "daily quota exhausted",
+            "timestamp": datetime.now(timezone.utc)
+        })
+    return planned[:allowed]
+
+
+def _iter_requests(planned, client, concurrent=True, max_workers=GNEWS_MAX_WORKERS):
+    """Run the planned requests, yielding (index, category, items, request_logs) as each finishes."""
+    if not concurrent:
+        for i, (cat, country) in enumerate(planned):
+            request_logs = []
+            items = fetch_category_news(cat, country, is_top=False, logs=request_logs, client=client)
+            yield i, cat, items, request_logs
+            time.sleep(1)
+        return
+
+    bucket = TokenBucket(GNEWS_RATE_PER_SEC, GNEWS_BURST)
+
+    def worker(i, cat, country):
+        request_logs = []
+        bucket.acquire()
+        items = fetch_category_news(cat, country, is_top=False, logs=request_logs, client=client)
+        return i, cat, items, request_logs
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gnews") as executor:
+        futures = [executor.submit(worker, i, cat, country) for i, (cat, country) in enumerate(planned)]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def new_summary_log(client):
+    """Run-level HTTP totals for the gnews logs."""
+    http = client.report()
+    return {
+        "source": "gnews",
+        "type": "summary",
+        "requests": http["requests"],
+        "bytes_transferred": http["bytes_transferred"],
+        "bytes_decoded": http["bytes_decoded"],
+        "reused_connections": http["reused_connections"],
+        "timestamp": datetime.now(timezone.utc)
+    }
+
+
+def collect_news(concurrent=True, max_workers=GNEWS_MAX_WORKERS, use_quota=True):
+    all_news = {cat: [] for cat in CATEGORIES}
+    logs = []
+
+    planned = _reserve_planned(plan_requests(), logs, use_quota)
+
+    client = HttpClient(pool_maxsize=max_workers)
+    try:
+        # merge in request order so output matches the sequential collector
+        results = sorted(_iter_requests(planned, client, concurrent, max_workers), key=lambda r: r[0])
+        for _, cat, items, request_logs in results:
+            all_news[cat].extend(items)
+            logs.extend(request_logs)
+        logs.append(new_summary_log(client))
+    finally:
+        client.close()
 
     return all_news, logs
 
 
+def iter_gnews_news(logs, concurrent=True, max_workers=GNEWS_MAX_WORKERS, use_quota=True):
+    """
+    Streaming form of collect_news: yields articles as each request
+    completes and appends the request logs to `logs`.
+    """
+    planned = _reserve_planned(plan_requests(), logs, use_quota)
+    client = HttpClient(pool_maxsize=max_workers)
+    try:
+        for _, _, items, request_logs in _iter_requests(planned, client, concurrent, max_workers):
+            logs.extend(request_logs)
+            yield from items
+        logs.append(new_summary_log(client))
+    finally:
+        client.close()
+
+
 if __name__ == "__main__":
-    news_data, logs = collect_news()
+    parser = argparse.ArgumentParser(description="Fetch today's GNews articles.")
+    parser.add_argument("--profile", nargs="?", const=PROFILE_DEFAULT_DIR, default=None, metavar="DIR",
+                        help="cProfile + tracemalloc the fetch into DIR (or set PIPELINE_PROFILE_DIR)")
+    args = parser.parse_args()
+    profiler = profiler_from(args.profile)
+
+    pipeline_metrics.start_run(profiler is not None, profiler)
+    # sequential while profiling: cProfile only sees the calling thread
+    with pipeline_metrics.stage("gnews") as st:
+        news_data, logs = collect_news(concurrent=profiler is None)
+        st.items_out = sum(len(v) for v in news_data.values())
+    pipeline_metrics.end_run()
+    if profiler is not None:
+        profiler.write_report()
+
     print(f"✅ Collected GNews articles: {sum(len(v) for v in news_data.values())}")
     print(f"📝 Logs: {len(logs)}")
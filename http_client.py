@@ -0,0 +1,150 @@
+import threading
+import time
+from urllib.parse import urlparse
+
+from pipeline_metrics import record_http
+
+# --- Limits ---
+HTTP_POOL_MAXSIZE = 4                    # keep-alive connections kept per host
+HTTP_MAX_RESPONSE_BYTES = 5 * 1024 * 1024  # decoded body cap per response
+HTTP_CHUNK_SIZE = 64 * 1024
+
+
+def _accept_encoding():
+    """gzip/deflate always; br only when urllib3 can decode it."""
+    encodings = ["gzip", "deflate"]
+    for module in ("brotli", "brotlicffi"):
+        try:
+            __import__(module)
+        except ImportError:
+            continue
+        encodings.append("br")
+        break
+    return ", ".join(encodings)
+
+
+ACCEPT_ENCODING = _accept_encoding()
+
+
+class ResponseTooLarge(OSError):
+    """
+    Body exceeded the client's max_bytes; the connection is dropped, not reused.
+    An OSError like requests' own exceptions, so this module imports without requests.
+    """
+
+
+# --- Shared Client ---
+class HttpClient:
+    """
+    Shared HTTP layer for one run: a keep-alive requests.Session per host,
+    explicit compression negotiation, streamed downloads capped at
+    `max_bytes`, and counters for bytes on the wire and reused connections.
+    get() returns a normal requests.Response with the body already read.
+    requests itself is imported when the first session is opened.
+    """
+
+    def __init__(self, pool_maxsize=HTTP_POOL_MAXSIZE, max_bytes=HTTP_MAX_RESPONSE_BYTES):
+        self.pool_maxsize = pool_maxsize
+        self.max_bytes = max_bytes
+        self.sessions = {}
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "bytes_transferred": 0, "bytes_decoded": 0, "too_large": 0}
+
+    def session(self, url):
+        host = urlparse(url).netloc
+        with self.lock:
+            session = self.sessions.get(host)
+            if session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+                self.sessions[host] = session
+            return session
+
+    def get(self, url, **kwargs):
+        started = time.perf_counter()
+        try:
+            resp = self._get(url, **kwargs)
+        except Exception:
+            record_http(urlparse(url).netloc, round((time.perf_counter() - started) * 1000, 1), ok=False)
+            raise
+        record_http(urlparse(url).netloc, round((time.perf_counter() - started) * 1000, 1),
+                    ok=resp.status_code < 400)
+        return resp
+
+    def _get(self, url, **kwargs):
+        kwargs["stream"] = True
+        resp = self.session(url).get(url, **kwargs)
+
+        declared = resp.headers.get("Content-Length")
+        if declared and declared.isdigit() and int(declared) > self.max_bytes:
+            self._too_large(resp, url)
+
+        chunks = []
+        size = 0
+        for chunk in resp.iter_content(HTTP_CHUNK_SIZE):
+            size += len(chunk)
+            if size > self.max_bytes:
+                self._too_large(resp, url)
+            chunks.append(chunk)
+        resp._content = b"".join(chunks)
+        resp._content_consumed = True
+
+        with self.lock:
+            self.stats["requests"] += 1
+            self.stats["bytes_transferred"] += resp.raw.tell() if resp.raw is not None else size
+            self.stats["bytes_decoded"] += size
+        return resp
+
+    def _too_large(self, resp, url):
+        resp.close()
+        with self.lock:
+            self.stats["too_large"] += 1
+        raise ResponseTooLarge(f"Response from {url} exceeds {self.max_bytes} bytes")
+
+    def reused_connections(self):
+        """Requests served on an already-open connection, across every host pool."""
+        reused = 0
+        with self.lock:
+            sessions = list(self.sessions.values())
+        for session in sessions:
+            # the same adapter is mounted for http:// and https://
+            for adapter in {id(a): a for a in session.adapters.values()}.values():
+                pools = adapter.poolmanager.pools
+                for key in pools.keys():
+                    pool = pools.get(key)
+                    if pool is not None:
+                        reused += max(0, pool.num_requests - pool.num_connections)
+        return reused
+
+    def report(self):
+        """Run totals for logs: requests, wire/decoded bytes, reused connections."""
+        with self.lock:
+            report = dict(self.stats)
+        report["hosts"] = len(self.sessions)
+        report["reused_connections"] = self.reused_connections()
+        return report
+
+    def close(self):
+        with self.lock:
+            sessions, self.sessions = list(self.sessions.values()), {}
+        for session in sessions:
+            session.close()
+
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def default_client():
+    """Process-wide HttpClient for callers that don't manage one per run."""
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = HttpClient()
+        return _default_client
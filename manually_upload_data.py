@@ -1,19 +1,9 @@
-import os
 import json
 import hashlib
 from datetime import datetime, timezone
-from dotenv import load_dotenv
-from pymongo import MongoClient
 
-# --- Load .env ---
-load_dotenv()
-MONGO_URI = os.getenv("MONGO_URI")
-DB_NAME = "newsdb"
-
-# --- Mongo Connection ---
-client = MongoClient(MONGO_URI)
-db = client[DB_NAME]
-news_col = db["news"]
+from article import Article
+from mongo_config import get_collection
 
 # --- Utility: Generate Unique Hash for Article ---
 def get_hash(article: dict) -> str:
@@ -22,41 +12,17 @@ def get_hash(article: dict) -> str:
 
 # --- Save Articles ---
 def save_articles(articles: list):
+    news_col = get_collection("news")
     inserted, updated = 0, 0
     for article in articles:
         hash_id = get_hash(article)
 
-        published_at = article.get("published_at")
-        fetched_at = article.get("fetched_at")
-
-        date_str = published_at.split("T")[0] if published_at else None
-
-        doc = {
-            "articleId": hash_id,
-            "title": article.get("title"),
-            "description": article.get("description"),
-            "author": article.get("author"),
-            "source": article.get("source"),
-            "url": article.get("url"),
-            "imageUrl": article.get("image_url"),
-            "category": article.get("category"),
-            "tags": article.get("tags", []),
-
-            "publishedAt": datetime.fromisoformat(published_at.replace("Z", "+00:00")) if published_at else None,
-            "fetchedAt": datetime.fromisoformat(fetched_at.replace("Z", "+00:00")) if fetched_at else datetime.now(timezone.utc),
-            "date": date_str,
-
-            "score": article.get("score"),
-            "hotness": article.get("hotness"),
-            "impactScore": article.get("impact_score"),
-            "popularityScore": article.get("popularity_score", 0),
-
-            "viewsCount": 0,
-            "likesCount": 0,
-            "aiGenerationsCount": 0,
-
-            "updatedAt": datetime.now(timezone.utc)
-        }
+        record = Article.from_dict(article)
+        record.article_id = hash_id
+        doc = record.to_mongo()
+        doc["viewsCount"] = 0
+        doc["likesCount"] = 0
+        doc["aiGenerationsCount"] = 0
 
         existing = news_col.find_one({"articleId": doc["articleId"]})
         if existing:
@@ -0,0 +1,31 @@
+import os
+from functools import lru_cache
+from dotenv import load_dotenv
+
+from pipeline_metrics import PIPELINE_METRICS, mongo_listener
+
+# --- Load .env ---
+load_dotenv()
+MONGO_URI = os.getenv("MONGO_URI")
+DB_NAME = "newsdb"
+
+
+# --- Mongo Client ---
+@lru_cache(maxsize=None)
+def get_mongo_client():
+    """
+    The process-wide MongoClient, built on first use so importing a module
+    doesn't pay for pymongo or the SRV/DNS lookup. The round-trip listener
+    is registered here because pymongo only takes listeners at construction.
+    """
+    from pymongo import MongoClient
+
+    return MongoClient(MONGO_URI, event_listeners=[mongo_listener()] if PIPELINE_METRICS else [])
+
+
+def get_db():
+    return get_mongo_client()[DB_NAME]
+
+
+def get_collection(name: str):
+    return get_db()[name]
@@ -0,0 +1,218 @@
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+from feed_health import percentile
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+PIPELINE_METRICS = os.getenv("PIPELINE_METRICS", "1") == "1"
+
+
+# --- Stage Timer ---
+class Stage:
+    """Context manager timing one stage; set items_out (and items_in) inside the block."""
+    __slots__ = ("run", "name", "items_in", "items_out", "wall", "cpu")
+
+    def __init__(self, run, name, items_in=None):
+        self.run = run
+        self.name = name
+        self.items_in = items_in
+        self.items_out = None
+
+    def __enter__(self):
+        if self.run.profiler is not None:
+            self.run.profiler.start(self.name)
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        wall_ms = (time.perf_counter() - self.wall) * 1000
+        cpu_ms = (time.process_time() - self.cpu) * 1000
+        if self.run.profiler is not None:
+            self.run.profiler.stop(self.name)
+        self.run.add_stage(self.name, wall_ms, cpu_ms, self.items_in, self.items_out)
+        return False
+
+
+class _NullStage:
+    """What stage() hands out when metrics are off: no clock reads, no locking."""
+    __slots__ = ("items_in", "items_out")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+# --- Run Record ---
+class RunMetrics:
+    """
+    Telemetry for one pipeline run: per-stage wall/CPU time and item
+    counts, per-request HTTP latency, Mongo command round trips and peak
+    RSS. to_doc() gives the pipeline_runs document. With a `profiler`
+    (pipeline_profiler.StageProfiler) every stage is also profiled.
+    """
+
+    def __init__(self, enabled=True, profiler=None):
+        self.enabled = enabled
+        self.profiler = profiler
+        self.started_at = datetime.now(timezone.utc)
+        self.lock = threading.Lock()
+        self.stages = {}   # name -> totals; a stage entered several times (e.g. per batch) accumulates
+        self.http = {}     # host -> [latency_ms, ...]
+        self.http_errors = 0
+        self.db = {}       # command name -> {"count", "failed", "total_ms"}
+
+    def stage(self, name, items_in=None):
+        if not self.enabled:
+            return _NULL_STAGE
+        return Stage(self, name, items_in)
+
+    def add_stage(self, name, wall_ms, cpu_ms, items_in, items_out):
+        with self.lock:
+            record = self.stages.setdefault(name, {
+                "name": name, "calls": 0, "wall_ms": 0.0, "cpu_ms": 0.0, "items_in": None, "items_out": None,
+            })
+            record["calls"] += 1
+            record["wall_ms"] += wall_ms
+            record["cpu_ms"] += cpu_ms
+            for field, value in (("items_in", items_in), ("items_out", items_out)):
+                if value is not None:
+                    record[field] = (record[field] or 0) + value
+
+    def record_http(self, host, latency_ms, ok=True):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.http.setdefault(host, []).append(latency_ms)
+            if not ok:
+                self.http_errors += 1
+
+    def record_db(self, command, duration_ms, ok=True):
+        if not self.enabled:
+            return
+        with self.lock:
+            record = self.db.setdefault(command, {"count": 0, "failed": 0, "total_ms": 0.0})
+            record["count"] += 1
+            record["total_ms"] += duration_ms
+            if not ok:
+                record["failed"] += 1
+
+    def to_doc(self) -> dict:
+        with self.lock:
+            latencies = [ms for host_latencies in self.http.values() for ms in host_latencies]
+            return {
+                "startedAt": self.started_at,
+                "finishedAt": datetime.now(timezone.utc),
+                "stages": [
+                    {**record, "wall_ms": round(record["wall_ms"], 1), "cpu_ms": round(record["cpu_ms"], 1)}
+                    for record in self.stages.values()
+                ],
+                "http": {
+                    "requests": len(latencies),
+                    "errors": self.http_errors,
+                    "p50_ms": percentile(latencies, 50),
+                    "p95_ms": percentile(latencies, 95),
+                    "hosts": [
+                        {"host": host, "requests": len(values),
+                         "p50_ms": percentile(values, 50), "p95_ms": percentile(values, 95)}
+                        for host, values in sorted(self.http.items())
+                    ],
+                },
+                "db": {
+                    "roundTrips": sum(r["count"] for r in self.db.values()),
+                    "commands": {name: {**r, "total_ms": round(r["total_ms"], 1)} for name, r in self.db.items()},
+                },
+                "peakRssMb": peak_rss_mb(),
+            }
+
+    def print_summary(self, doc=None):
+        doc = doc or self.to_doc()
+        print(f"{'stage':<16}{'calls':>6}{'wall ms':>11}{'cpu ms':>11}{'in':>8}{'out':>8}")
+        for record in doc["stages"]:
+            items_in = "-" if record["items_in"] is None else record["items_in"]
+            items_out = "-" if record["items_out"] is None else record["items_out"]
+            print(f"{record['name']:<16}{record['calls']:>6}{record['wall_ms']:>11.1f}"
+                  f"{record['cpu_ms']:>11.1f}{items_in:>8}{items_out:>8}")
+        http = doc["http"]
+        print(f"🌐 HTTP: {http['requests']} requests, {http['errors']} errors, "
+              f"p50 {http['p50_ms']} ms, p95 {http['p95_ms']} ms")
+        print(f"🗄️ Mongo round trips: {doc['db']['roundTrips']}")
+        if doc["peakRssMb"] is not None:
+            print(f"🧠 Peak RSS: {doc['peakRssMb']} MB")
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+# --- Active Run ---
+_DISABLED = RunMetrics(enabled=False)
+_active = _DISABLED
+
+
+def start_run(enabled=PIPELINE_METRICS, profiler=None) -> RunMetrics:
+    """
+    Make a fresh RunMetrics the target of stage()/record_http()/record_db().
+    A profiler needs the stage timers, so it turns metrics on.
+    """
+    global _active
+    _active = RunMetrics(enabled or profiler is not None, profiler)
+    return _active
+
+
+def end_run():
+    global _active
+    _active = _DISABLED
+
+
+def current() -> RunMetrics:
+    return _active
+
+
+def stage(name, items_in=None):
+    return _active.stage(name, items_in)
+
+
+def record_http(host, latency_ms, ok=True):
+    _active.record_http(host, latency_ms, ok)
+
+
+def record_db(command, duration_ms, ok=True):
+    _active.record_db(command, duration_ms, ok)
+
+
+# --- Mongo Command Listener ---
+def mongo_listener():
+    """
+    pymongo CommandListener counting round trips into the active run.
+    Register it before the MongoClient is created.
+    """
+    from pymongo import monitoring
+
+    class MongoRoundTrips(monitoring.CommandListener):
+        def started(self, event):
+            pass
+
+        def succeeded(self, event):
+            record_db(event.command_name, event.duration_micros / 1000)
+
+        def failed(self, event):
+            record_db(event.command_name, event.duration_micros / 1000, ok=False)
+
+    return MongoRoundTrips()
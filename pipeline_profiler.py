@@ -0,0 +1,90 @@
+import cProfile
+import io
+import os
+import pstats
+import re
+import time
+import tracemalloc
+
+# set to an output directory to turn profiling on without a CLI flag
+PIPELINE_PROFILE_DIR = os.getenv("PIPELINE_PROFILE_DIR") or None
+PROFILE_DEFAULT_DIR = "profile_output"
+PROFILE_TOP_N = int(os.getenv("PIPELINE_PROFILE_TOP", "25"))
+PROFILE_TRACE_FRAMES = 5  # traceback depth tracemalloc keeps per allocation
+
+
+class StageProfiler:
+    """
+    cProfile + tracemalloc around each pipeline stage. Each stage writes
+    <n>_<stage>.prof (open with pstats or snakeviz), and write_report()
+    collects the top-N self-time hotspots and allocation growth per stage
+    into report.txt.
+    cProfile only sees the thread that entered the stage, so entry points
+    run their fetchers sequentially and in-process while profiling.
+    """
+
+    def __init__(self, out_dir=PROFILE_DEFAULT_DIR, top_n=PROFILE_TOP_N):
+        self.out_dir = out_dir
+        self.top_n = top_n
+        self.sections = []
+        self.current = None
+        os.makedirs(out_dir, exist_ok=True)
+
+    def start(self, name):
+        if self.current is not None:  # stages don't nest; profile the outer one
+            return
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(PROFILE_TRACE_FRAMES)
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+        profile = cProfile.Profile()
+        self.current = (name, profile, before, time.perf_counter())
+        profile.enable()
+
+    def stop(self, name):
+        if self.current is None or self.current[0] != name:
+            return
+        _, profile, before, started = self.current
+        profile.disable()
+        wall_ms = (time.perf_counter() - started) * 1000
+        peak_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        after = tracemalloc.take_snapshot()
+        self.current = None
+
+        slug = re.sub(r"[^a-z0-9_]+", "_", name.lower())
+        path = os.path.join(self.out_dir, f"{len(self.sections) + 1:02d}_{slug}.prof")
+        profile.dump_stats(path)
+
+        hotspots = io.StringIO()
+        pstats.Stats(profile, stream=hotspots).strip_dirs().sort_stats("tottime").print_stats(self.top_n)
+        growth = after.compare_to(before, "lineno")[:self.top_n]
+        self.sections.append({
+            "name": name,
+            "profile": path,
+            "wall_ms": wall_ms,
+            "peak_mb": peak_mb,
+            "hotspots": hotspots.getvalue(),
+            "allocations": [str(stat) for stat in growth],
+        })
+
+    def write_report(self):
+        """Write report.txt with every profiled stage; returns its path."""
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        path = os.path.join(self.out_dir, "report.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            for section in self.sections:
+                f.write(f"=== {section['name']} — {section['wall_ms']:.1f} ms, "
+                        f"peak traced {section['peak_mb']:.1f} MB ({section['profile']})\n\n")
+                f.write(f"Top {self.top_n} functions by self time:\n{section['hotspots']}\n")
+                f.write(f"Top {self.top_n} allocation sites by growth:\n")
+                f.write("\n".join(section["allocations"]) or "(none)")
+                f.write("\n\n")
+        print(f"🔬 Profiles for {len(self.sections)} stage(s) written to {self.out_dir}/ (report: {path})")
+        return path
+
+
+def profiler_from(cli_dir=None):
+    """StageProfiler for a --profile [DIR] value or PIPELINE_PROFILE_DIR, else None."""
+    out_dir = cli_dir or PIPELINE_PROFILE_DIR
+    return StageProfiler(out_dir) if out_dir else None
@@ -1,9 +1,22 @@
-import feedparser
+import argparse
+import hashlib
+import json
+import os
 from datetime import datetime, timezone
 from dotenv import load_dotenv
-import requests
+import threading
 import time
-from requests.exceptions import RequestException
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from urllib.parse import urlparse
+
+from article import Article
+from fast_feed_parser import parse_feed_bytes
+from filter_update_news import process_pool
+from http_client import HttpClient, ResponseTooLarge, default_client
+from feed_health import FeedHealth
+import pipeline_metrics
+from pipeline_profiler import PROFILE_DEFAULT_DIR, profiler_from
 
 # --- Load env ---
 load_dotenv()
@@ -55,7 +68,164 @@ RSS_FEEDS = {
     ]
 }
 
-def fetch_single_feed(feed_url, timeout=20, retries=2, delay=3):
+# --- Concurrency ---
+RSS_MAX_WORKERS = 8          # global cap on in-flight feed fetches
+RSS_PER_HOST_LIMIT = 2       # in-flight fetches allowed against one host
+RSS_DEADLINE_SECONDS = 120   # overall budget for one fetch_rss_news run
+RSS_ENTRIES_PER_FEED = 10
+# stop parsing plain RSS 2.0 / Atom after RSS_ENTRIES_PER_FEED entries
+RSS_FAST_PARSE = os.getenv("RSS_FAST_PARSE", "1") == "1"
+
+# --- Conditional-GET cache ---
+RSS_CACHE_PATH = os.getenv("RSS_CACHE_PATH", ".cache/rss_feed_cache.json")
+
+
+def load_feed_cache(path=RSS_CACHE_PATH):
+    """Load the per-URL ETag / Last-Modified / entries cache from disk."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_feed_cache(cache, path=RSS_CACHE_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+# --- High-water marks ---
+RSS_SEEN_PATH = os.getenv("RSS_SEEN_PATH", ".cache/rss_seen.json")
+RSS_SEEN_PER_FEED = 100   # entry keys remembered per feed (10x what one fetch returns)
+RSS_FULL_REINGEST = os.getenv("RSS_FULL_REINGEST", "0") == "1"
+
+
+def entry_key(entry):
+    """Same fields get_hash builds the article id from, so an unchanged key means an unchanged article."""
+    base = f"{entry['link']}_{entry['published_at']}_{entry['title']}"
+    return hashlib.md5(base.encode("utf-8")).hexdigest()
+
+
+class SeenEntries:
+    """
+    Per-feed keys of entries already handed to the pipeline. filter() drops
+    known entries right after parsing; the keys it lets through stay pending
+    until commit(), which the caller runs once the articles are saved.
+    """
+
+    def __init__(self, records=None, path=RSS_SEEN_PATH, full_reingest=RSS_FULL_REINGEST):
+        self.records = records or {}
+        self.path = path
+        self.full_reingest = full_reingest
+        self.pending = {}
+
+    @classmethod
+    def load(cls, path=RSS_SEEN_PATH, full_reingest=RSS_FULL_REINGEST):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return cls(json.load(f), path, full_reingest)
+        except (OSError, ValueError):
+            return cls(path=path, full_reingest=full_reingest)
+
+    def filter(self, feed_url, entries):
+        """Return (new entries, skipped count). full_reingest keeps everything but still records keys."""
+        known = set(self.records.get(feed_url, ()))
+        fresh, keys = [], []
+        for entry in entries:
+            key = entry_key(entry)
+            if key in known and not self.full_reingest:
+                continue
+            fresh.append(entry)
+            keys.append(key)
+        self.pending.setdefault(feed_url, []).extend(keys)
+        return fresh, len(entries) - len(fresh)
+
+    def commit(self):
+        """Fold pending keys into the marks and persist them."""
+        for feed_url, keys in self.pending.items():
+            new_keys = set(keys)
+            merged = [k for k in self.records.get(feed_url, []) if k not in new_keys] + keys
+            self.records[feed_url] = merged[-RSS_SEEN_PER_FEED:]
+        self.pending = {}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.records, f)
+        os.replace(tmp_path, self.path)
+
+
+def extract_entries(feed):
+    """Reduce a feedparser result to the fields the pipeline uses."""
+    entries = []
+    for entry in feed.entries[:RSS_ENTRIES_PER_FEED]:
+        image_url = None
+        if "media_content" in entry:
+            image_url = entry.media_content[0].get("url", None)
+        elif "media_thumbnail" in entry:
+            image_url = entry.media_thumbnail[0].get("url", None)
+
+        published_at = None
+        if "published_parsed" in entry:
+            published_at = datetime(*entry.published_parsed[:6]).isoformat()
+
+        entries.append({
+            "title": entry.get("title"),
+            "summary": entry.get("summary", ""),
+            "author": entry.get("author", "Unknown"),
+            "link": entry.get("link", ""),
+            "image_url": image_url,
+            "published_at": published_at,
+        })
+
+    return {
+        "source": feed.feed.get("title", "Unknown Source"),
+        "entries": entries,
+        "cache_hit": False,
+    }
+
+
+def parse_feed_content(content, content_type=None):
+    """
+    Bounded fast parse of plain RSS 2.0 / Atom, feedparser for everything else.
+    Takes the raw body bytes so it can run in a worker process.
+    feedparser is imported lazily, but not rarely: the fast path also
+    loads it to sanitize any HTML summary.
+    """
+    if RSS_FAST_PARSE:
+        parsed = parse_feed_bytes(content, RSS_ENTRIES_PER_FEED)
+        if parsed is not None:
+            return parsed
+    import feedparser
+
+    response_headers = {"content-type": content_type} if content_type else None
+    return extract_entries(feedparser.parse(content, response_headers=response_headers))
+
+
+def parse_feed(resp, parse_pool=None):
+    """Parse a feed response, on `parse_pool` (a ProcessPoolExecutor) when given."""
+    content_type = resp.headers.get("Content-Type")
+    if parse_pool is not None:
+        return parse_pool.submit(parse_feed_content, resp.content, content_type).result()
+    return parse_feed_content(resp.content, content_type)
+
+
+def fetch_single_feed(feed_url, timeout=20, retries=2, delay=3, deadline_at=None, cache=None,
+                      client=None, parse_pool=None, fallback=True):
+    """
+    Fetch one feed and return {"source", "entries", "cache_hit"} or None.
+    With a `cache` dict, sends If-None-Match / If-Modified-Since and serves
+    the cached entries without parsing on a 304. Requests go through `client`
+    (an HttpClient, so feeds on the same host reuse connections and bodies
+    are size-capped); `parse_pool` moves parsing off the fetch thread into
+    a worker process. With fallback=False a failed fetch is not retried
+    through feedparser's own downloader; entries that do come from that
+    fallback are flagged "fallback": True.
+    """
+    from requests.exceptions import RequestException
+
     headers = {
         "User-Agent": (
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
@@ -63,95 +233,374 @@ def fetch_single_feed(feed_url, timeout=20, retries=2, delay=3):
             "Chrome/124.0.0.0 Safari/537.36"
         )
     }
+    cached = cache.get(feed_url) if cache is not None else None
+    if cached and cached.get("entries"):
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
 
     for attempt in range(retries):
+        if deadline_at and time.monotonic() >= deadline_at:
+            print(f"⏱️ Deadline reached, giving up on {feed_url}")
+            return None
         try:
-            resp = requests.get(feed_url, timeout=timeout, headers=headers, allow_redirects=True)
+            resp = (client or default_client()).get(feed_url, timeout=timeout, headers=headers,
+                                                    allow_redirects=True)
+            if resp.status_code == 304 and cached:
+                return {"source": cached["source"], "entries": cached["entries"], "cache_hit": True}
             resp.raise_for_status()
-            return feedparser.parse(resp.text)
+            parsed = parse_feed(resp, parse_pool)
+            if cache is not None:
+                cache[feed_url] = {
+                    "etag": resp.headers.get("ETag"),
+                    "last_modified": resp.headers.get("Last-Modified"),
+                    "source": parsed["source"],
+                    "entries": parsed["entries"],
+                }
+            return parsed
+        except ResponseTooLarge as e:
+            print(f"❌ {e}")
+            return None
         except RequestException as e:
             print(f"⚠️ Error fetching {feed_url} (attempt {attempt+1}/{retries}): {e}")
-            time.sleep(delay)
+            if attempt + 1 < retries:
+                time.sleep(delay)
+
+    if not fallback:
+        return None
+
+    if deadline_at and time.monotonic() >= deadline_at:
+        print(f"⏱️ Deadline reached, skipping fallback for {feed_url}")
+        return None
 
     # 🔄 fallback: let feedparser fetch directly if requests fails
     try:
         print(f"⏪ Falling back to direct feedparser for {feed_url}")
-        return feedparser.parse(feed_url)
+        import feedparser
+
+        feed = feedparser.parse(feed_url)
+        # an unreachable host doesn't raise, it comes back as an empty bozo result
+        if feed.get("bozo") and not feed.entries:
+            print(f"❌ Final failure for {feed_url}: {feed.get('bozo_exception')}")
+            return None
+        return {**extract_entries(feed), "fallback": True}
     except Exception as e:
         print(f"❌ Final failure for {feed_url}: {e}")
         return None
 
 
+def build_news_items(parsed, category):
+    source = parsed["source"]
+    news_items = []
+
+    for entry in parsed["entries"]:
+        tags = [category.capitalize(), "Breaking"]
+
+        news_item = Article(
+            title=entry["title"],
+            description=entry["summary"],
+            author=entry["author"],
+            source=source,
+            url=entry["link"],
+            image_url=entry["image_url"],
+            category=category,
+            tags=tags,
+            popularity_score=None,
+            published_at=entry["published_at"],
+            fetched_at=datetime.now(timezone.utc).isoformat()
+        )
+        news_items.append(news_item)
+
+    return news_items
+
+
+def new_feed_log(category, feed_url, error=None):
+    return {
+        "source": "rss",
+        "category": category,
+        "url": feed_url,
+        "articles_count": 0,
+        "latency_ms": None,
+        "cache_hit": False,
+        "skipped_count": 0,
+        "circuit": None,
+        "fallback": False,
+        "error": error,
+        "timestamp": datetime.now(timezone.utc)
+    }
+
+
+def plan_feed_fetches(feeds_config=None):
+    """
+    Collapse the feed config into unique URLs grouped by host.
+    Returns {host: [feed_url, ...]} in first-seen order.
+    """
+    plan = {}
+    seen = set()
+    for feeds in (feeds_config or RSS_FEEDS).values():
+        for feed_url in feeds:
+            if feed_url in seen:
+                continue
+            seen.add(feed_url)
+            plan.setdefault(urlparse(feed_url).netloc, []).append(feed_url)
+    return plan
+
+
+def fetch_feed(feed_url, deadline_at=None, cache=None, client=None, parse_pool=None, policy=None):
+    """
+    Fetch one feed with the timeout/retries/fallback of its FeedHealth
+    `policy`. Returns {"parsed", "latency_ms", "error", "circuit", "fallback"}.
+    """
+    policy = policy or {}
+    started = time.monotonic()
+    try:
+        parsed = fetch_single_feed(feed_url, timeout=policy.get("timeout", 20),
+                                   retries=policy.get("retries", 2), deadline_at=deadline_at,
+                                   cache=cache, client=client, parse_pool=parse_pool,
+                                   fallback=policy.get("fallback", True))
+        error = None if parsed else "All retries failed"
+    except Exception as e:
+        parsed, error = None, str(e)
+    return {
+        "parsed": parsed,
+        "latency_ms": round((time.monotonic() - started) * 1000, 1),
+        "error": error,
+        "circuit": policy.get("state", "closed"),
+        "fallback": bool(parsed and parsed.get("fallback")),
+    }
+
+
+def _future_result(future):
+    if future.done() and not future.cancelled() and future.exception() is None:
+        return future.result()
+    error = future.exception() if future.done() and not future.cancelled() else None
+    return {
+        "parsed": None,
+        "latency_ms": None,
+        "error": str(error) if error else "RSS fetch deadline exceeded",
+        "circuit": None,
+        "fallback": False,
+    }
+
+
+def _iter_fetch_concurrently(plan, client, max_workers, per_host_limit, deadline, cache=None,
+                             parse_pool=None, policies=None):
+    """Run fetch_feed for every planned URL on a thread pool, yielding (url, result) as each finishes."""
+    deadline_at = time.monotonic() + deadline
+    host_limits = {host: threading.Semaphore(per_host_limit) for host in plan}
+
+    def worker(host, feed_url):
+        with host_limits[host]:
+            if time.monotonic() >= deadline_at:
+                raise TimeoutError("RSS fetch deadline exceeded before start")
+            return fetch_feed(feed_url, deadline_at=deadline_at, cache=cache, client=client,
+                              parse_pool=parse_pool, policy=policies.get(feed_url))
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rss")
+    futures = {
+        executor.submit(worker, host, feed_url): feed_url
+        for host, urls in plan.items() for feed_url in urls
+    }
+    pending = dict(futures)
+    try:
+        for future in as_completed(futures, timeout=max(0.0, deadline_at - time.monotonic())):
+            del pending[future]
+            yield futures[future], _future_result(future)
+    except FuturesTimeoutError:
+        pass
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    for future, feed_url in pending.items():
+        yield feed_url, _future_result(future)
+
+
+def _skipped_result():
+    return {"parsed": None, "latency_ms": None, "error": "circuit open, skipped", "circuit": "open",
+            "fallback": False}
+
+
+def _iter_fetch_planned(plan, client, concurrent, max_workers, per_host_limit, deadline, cache=None,
+                        parse_workers=1, health=None):
+    """
+    Fetch every planned URL once through `client`, yielding (url, result) in
+    completion order. Feeds whose `health` circuit is open are skipped up
+    front. With parse_workers > 1, response bodies are parsed on a process pool.
+    """
+    policies = {}
+    if health is not None:
+        policies = {feed_url: health.policy(feed_url) for urls in plan.values() for feed_url in urls}
+        skipped = [feed_url for feed_url, policy in policies.items() if policy["state"] == "open"]
+        if skipped:
+            print(f"⛔ Skipping {len(skipped)} feed(s) with an open circuit")
+        for feed_url in skipped:
+            yield feed_url, _skipped_result()
+        skipped = set(skipped)
+        plan = {host: [u for u in urls if u not in skipped] for host, urls in plan.items()}
+        plan = {host: urls for host, urls in plan.items() if urls}
 
-def fetch_rss_news():
+    parse_pool = process_pool(parse_workers) if parse_workers > 1 else None
+    try:
+        if concurrent:
+            yield from _iter_fetch_concurrently(plan, client, max_workers, per_host_limit, deadline,
+                                                cache=cache, parse_pool=parse_pool, policies=policies)
+        else:
+            for urls in plan.values():
+                for feed_url in urls:
+                    yield feed_url, fetch_feed(feed_url, cache=cache, client=client,
+                                               parse_pool=parse_pool, policy=policies.get(feed_url))
+    finally:
+        if parse_pool is not None:
+            parse_pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _drop_seen(feed_url, result, seen):
+    """Drop entries `seen` already knows from a fetch result, before it fans out to categories."""
+    parsed = result["parsed"]
+    if seen is None or not parsed:
+        return result
+    entries, skipped = seen.filter(feed_url, parsed["entries"])
+    return {**result, "parsed": {**parsed, "entries": entries}, "skipped_count": skipped}
+
+
+def _news_for_category(category, feed_url, result):
+    """Fan one fetched feed out to a subscribing category. Returns (news_items, feed_log)."""
+    feed_log = new_feed_log(category, feed_url, result["error"])
+    feed_log["latency_ms"] = result["latency_ms"]
+    feed_log["circuit"] = result.get("circuit")
+    feed_log["fallback"] = result.get("fallback", False)
+    feed_log["skipped_count"] = result.get("skipped_count", 0)
+    news_items = []
+
+    parsed = result["parsed"]
+    if parsed:
+        news_items = build_news_items(parsed, category)
+        feed_log["articles_count"] = len(news_items)
+        feed_log["cache_hit"] = parsed["cache_hit"]
+
+    return news_items, feed_log
+
+
+def _finish_run(jobs, fetched, cache, rss_logs, client, health=None):
+    """
+    Persist the feed cache and feed health, and append the run summary
+    (with HTTP totals) to rss_logs.
+    """
+    if cache is not None:
+        try:
+            save_feed_cache(dict(cache))
+        except OSError as e:
+            print(f"⚠️ Could not save RSS feed cache: {e}")
+    if health is not None:
+        health.update_from_logs(rss_logs)
+        try:
+            health.save()
+        except OSError as e:
+            print(f"⚠️ Could not save RSS feed health: {e}")
+
+    skipped = sum(1 for r in fetched.values() if r.get("circuit") == "open")
+    fetch_count = len(fetched) - skipped
+    hits = sum(1 for r in fetched.values() if r["parsed"] and r["parsed"]["cache_hit"])
+    http = client.report()
+    rss_logs.append({
+        "source": "rss",
+        "type": "summary",
+        "feeds": len(jobs),
+        "fetches": fetch_count,
+        "fetches_saved": len(jobs) - len(fetched),
+        "feeds_skipped": skipped,
+        "entries_skipped": sum(r.get("skipped_count", 0) for r in fetched.values()),
+        "cache_hits": hits,
+        "cache_hit_rate": round(hits / fetch_count, 3) if fetch_count else 0.0,
+        "bytes_transferred": http["bytes_transferred"],
+        "bytes_decoded": http["bytes_decoded"],
+        "reused_connections": http["reused_connections"],
+        "timestamp": datetime.now(timezone.utc)
+    })
+
+
+def fetch_rss_news(concurrent=True, max_workers=RSS_MAX_WORKERS,
+                   per_host_limit=RSS_PER_HOST_LIMIT, deadline=RSS_DEADLINE_SECONDS,
+                   use_cache=True, parse_workers=1, use_health=True, seen=None):
+    """
+    Fetch every RSS feed; returns (news_items, rss_logs) in RSS_FEEDS order.
+    With a SeenEntries `seen`, entries ingested by earlier runs are dropped
+    right after parsing; call seen.commit() once the items are saved.
+    """
     news_list = []
     rss_logs = []
 
-    for category, feeds in RSS_FEEDS.items():
-        for feed_url in feeds:
-            feed_log = {
-                "source": "rss",
-                "category": category,
-                "url": feed_url,
-                "articles_count": 0,
-                "error": None,
-                "timestamp": datetime.now(timezone.utc)
-            }
-
-            try:
-                feed = fetch_single_feed(feed_url)
-                if not feed:
-                    raise Exception("All retries failed")
-
-                source = feed.feed.get("title", "Unknown Source")
-                count = 0
-
-                for entry in feed.entries[:10]:
-                    title = entry.get("title")
-                    description = entry.get("summary", "")
-                    author = entry.get("author", "Unknown")
-                    url = entry.get("link", "")
-                    image_url = None
-
-                    if "media_content" in entry:
-                        image_url = entry.media_content[0].get("url", None)
-                    elif "media_thumbnail" in entry:
-                        image_url = entry.media_thumbnail[0].get("url", None)
-
-                    published_at = None
-                    if "published_parsed" in entry:
-                        published_at = datetime(*entry.published_parsed[:6]).isoformat()
-
-                    tags = [category.capitalize(), "Breaking"]
-
-                    news_item = {
-                        "title": title,
-                        "description": description,
-                        "author": author,
-                        "source": source,
-                        "url": url,
-                        "image_url": image_url,
-                        "category": category,
-                        "tags": tags,
-                        "popularity_score": None,
-                        "published_at": published_at,
-                        "fetched_at": datetime.now(timezone.utc).isoformat()
-                    }
-
-                    news_list.append(news_item)
-                    count += 1
-
-                feed_log["articles_count"] = count
-
-            except Exception as e:
-                feed_log["error"] = str(e)
+    jobs = [(category, feed_url) for category, feeds in RSS_FEEDS.items() for feed_url in feeds]
+    cache = load_feed_cache() if use_cache else None
+    health = FeedHealth.load() if use_health else None
+    client = HttpClient(pool_maxsize=per_host_limit)
+    try:
+        fetched = {
+            feed_url: _drop_seen(feed_url, result, seen)
+            for feed_url, result in _iter_fetch_planned(plan_feed_fetches(), client, concurrent, max_workers,
+                                                        per_host_limit, deadline, cache=cache,
+                                                        parse_workers=parse_workers, health=health)
+        }
 
+        # fan each fetched feed out to every category that lists it, in RSS_FEEDS order
+        for category, feed_url in jobs:
+            news_items, feed_log = _news_for_category(category, feed_url, fetched[feed_url])
+            news_list.extend(news_items)
             rss_logs.append(feed_log)
 
+        _finish_run(jobs, fetched, cache, rss_logs, client, health)
+    finally:
+        client.close()
     return news_list, rss_logs
 
 
+def iter_rss_news(rss_logs, concurrent=True, max_workers=RSS_MAX_WORKERS,
+                  per_host_limit=RSS_PER_HOST_LIMIT, deadline=RSS_DEADLINE_SECONDS,
+                  use_cache=True, parse_workers=1, use_health=True, seen=None):
+    """
+    Streaming form of fetch_rss_news: yields news items as each feed
+    completes and appends the feed logs (and run summary) to `rss_logs`.
+    """
+    jobs = [(category, feed_url) for category, feeds in RSS_FEEDS.items() for feed_url in feeds]
+    subscribers = {}
+    for category, feed_url in jobs:
+        subscribers.setdefault(feed_url, []).append(category)
+
+    cache = load_feed_cache() if use_cache else None
+    health = FeedHealth.load() if use_health else None
+    client = HttpClient(pool_maxsize=per_host_limit)
+    fetched = {}
+    try:
+        for feed_url, result in _iter_fetch_planned(plan_feed_fetches(), client, concurrent, max_workers,
+                                                    per_host_limit, deadline, cache=cache,
+                                                    parse_workers=parse_workers, health=health):
+            result = _drop_seen(feed_url, result, seen)
+            fetched[feed_url] = result
+            for category in subscribers[feed_url]:
+                news_items, feed_log = _news_for_category(category, feed_url, result)
+                rss_logs.append(feed_log)
+                yield from news_items
+    finally:
+        _finish_run(jobs, fetched, cache, rss_logs, client, health)
+        client.close()
+
+
 if __name__ == "__main__":
-    news_data, logs = fetch_rss_news()
+    parser = argparse.ArgumentParser(description="Fetch every configured RSS feed.")
+    parser.add_argument("--profile", nargs="?", const=PROFILE_DEFAULT_DIR, default=None, metavar="DIR",
+                        help="cProfile + tracemalloc the fetch into DIR (or set PIPELINE_PROFILE_DIR)")
+    args = parser.parse_args()
+    profiler = profiler_from(args.profile)
+
+    pipeline_metrics.start_run(profiler is not None, profiler)
+    # sequential while profiling: cProfile only sees the calling thread
+    with pipeline_metrics.stage("rss") as st:
+        news_data, logs = fetch_rss_news(concurrent=profiler is None)
+        st.items_out = len(news_data)
+    pipeline_metrics.end_run()
+    if profiler is not None:
+        profiler.write_report()
+
     print(f"✅ Collected {len(news_data)} RSS news items")
     print(f"📝 Logs: {len(logs)}")
@@ -1,30 +1,22 @@
+import argparse
 import os
 import json
 import hashlib
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 import time
-from dotenv import load_dotenv
-from pymongo import MongoClient
 
 # Import your fetchers and processors
-from gnews_fetching import collect_news   # returns (articles, logs)
-from rss_feed_outof_india import fetch_rss_news  # returns (articles, logs)
-from filter_update_news import process_news_file  # your scoring/deduplication
-from combine_stage import combine_news  # your combine module
+from gnews_fetching import collect_news, iter_gnews_news   # returns (articles, logs)
+from rss_feed_outof_india import fetch_rss_news, iter_rss_news, SeenEntries, RSS_FULL_REINGEST  # returns (articles, logs)
+from filter_update_news import process_news_file, NewsDeduper, PROCESS_WORKERS  # your scoring/deduplication
+from combine_stage import combine_news, stream_news  # your combine module
 from supabase_config import save_articles_to_supabase
-
-# --- Load .env ---
-load_dotenv()
-MONGO_URI = os.getenv("MONGO_URI")
-DB_NAME = "newsdb"
-
-# --- Mongo Connection ---
-client = MongoClient(MONGO_URI)
-db = client[DB_NAME]
-news_col = db["news"]
-newsmap_col = db["newsmap"]
-gnews_logs_col = db["gnews_logs"]
-rss_logs_col = db["rss_logs"]
+from article import Article, as_article
+import pipeline_metrics
+from pipeline_metrics import PIPELINE_METRICS, stage
+from pipeline_profiler import PROFILE_DEFAULT_DIR, profiler_from
+# the Mongo client (and pymongo itself) is only created once a write or read needs it
+from mongo_config import get_collection
 
 # --- Utility: Generate Unique Hash for Article ---
 # def get_hash(article: dict) -> str:
@@ -33,90 +25,227 @@ rss_logs_col = db["rss_logs"]
 
 
 # --- Save Articles ---
-def save_articles(articles: list):
-    inserted, updated = 0, 0
+BULK_CHUNK_SIZE = 500  # upserts per bulk_write round trip
+
+# Fields covered by contentHash; anything else on the doc is derived from the articleId inputs
+CONTENT_HASH_FIELDS = ("title", "description", "imageUrl", "score", "hotness", "tags")
+
+def content_hash(doc: dict, **overrides) -> str:
+    """Fingerprint of the fields a re-fetch can change, with `overrides` swapped in."""
+    values = [overrides.get(field, doc.get(field)) for field in CONTENT_HASH_FIELDS]
+    return hashlib.md5(json.dumps(values, default=str).encode("utf-8")).hexdigest()
+
+def build_article_doc(article) -> dict:
+    """Mongo document for an article, minus the fields owned by the server."""
+    doc = as_article(article).to_mongo()
+    doc["contentHash"] = content_hash(doc)
+    return doc
+
+def _article_write(article_id: str, doc: dict, stored: dict):
+    """
+    Pick the write for one article given its stored {contentHash, score,
+    hotness} (None if new). Returns (UpdateOne or None, kind) where kind is
+    "skip", "score" or "full".
+    """
+    from pymongo import UpdateOne
+
+    if stored is not None:
+        if stored.get("contentHash") == doc["contentHash"]:
+            return None, "skip"
+        # same content under the stored score → only the score drifted
+        if stored.get("contentHash") == content_hash(doc, score=stored.get("score"), hotness=stored.get("hotness")):
+            return UpdateOne(
+                {"articleId": article_id},
+                {"$set": {
+                    "score": doc["score"],
+                    "hotness": doc["hotness"],
+                    "contentHash": doc["contentHash"],
+                    "updatedAt": doc["updatedAt"],
+                }},
+            ), "score"
+
+    return UpdateOne(
+        {"articleId": article_id},
+        {
+            "$set": doc,
+            "$setOnInsert": {
+                "viewsCount": 0,
+                "likesCount": 0,
+                "aiGenerationsCount": 0,
+                "createdAt": doc["updatedAt"],
+            },
+        },
+        upsert=True,
+    ), "full"
+
+def save_articles(articles: list, chunk_size: int = BULK_CHUNK_SIZE, collection=None):
+    """
+    Upsert articles with unordered bulk writes of `chunk_size`.
+    Engagement counters and createdAt are only set on insert, so existing
+    values are preserved server-side without reading them back. Each chunk
+    reads the stored contentHash of its articles in one query: unchanged
+    articles are skipped and score-only changes get a targeted $set.
+    `collection` defaults to the news collection.
+    """
+    from pymongo.errors import BulkWriteError
+
+    news_col = get_collection("news") if collection is None else collection
+    inserted, updated, failed, skipped, score_only = 0, 0, 0, 0, 0
+
+    # Same articleId twice in a run (feeds fanned out to several categories):
+    # keep the last doc. The earlier copies share its outcome: skipped with
+    # it, or counted as updates like the sequential writer did.
+    docs = {}
+    copies = {}
     for article in articles:
-        # hash_id = get_hash(article)
-
-        published_at = article.get("published_at")
-        fetched_at = article.get("fetched_at")
-
-        date_str = published_at.split("T")[0] if published_at else None
-
-        doc = {
-            "articleId": article.get("article_id") ,
-            "title": article.get("title"),
-            "description": article.get("description"),
-            "author": article.get("author"),
-            "source": article.get("source"),
-            "url": article.get("url"),
-            "imageUrl": article.get("image_url"),
-            "category": article.get("category"),
-            "tags": article.get("tags", []),
-
-            "publishedAt": datetime.fromisoformat(published_at.replace("Z", "+00:00")) if published_at else None,
-            "fetchedAt": datetime.fromisoformat(fetched_at.replace("Z", "+00:00")) if fetched_at else datetime.now(timezone.utc),
-            "date": date_str,
-
-            "score": article.get("score"),
-            "hotness": article.get("hotness"),
-            "impactScore": article.get("impact_score"),
-            "popularityScore": article.get("popularity_score", 0),
-
-            "viewsCount": 0,
-            "likesCount": 0,
-            "aiGenerationsCount": 0,
-
-            "updatedAt": datetime.now(timezone.utc)
+        doc = build_article_doc(article)
+        if doc["articleId"] in docs:
+            copies[doc["articleId"]] = copies.get(doc["articleId"], 0) + 1
+        docs[doc["articleId"]] = doc
+
+    items = list(docs.items())
+    for start in range(0, len(items), chunk_size):
+        chunk = items[start:start + chunk_size]
+        stored = {
+            d["articleId"]: d
+            for d in news_col.find(
+                {"articleId": {"$in": [article_id for article_id, _ in chunk]}},
+                {"_id": 0, "articleId": 1, "contentHash": 1, "score": 1, "hotness": 1},
+            )
         }
 
-        existing = news_col.find_one({"articleId": doc["articleId"]})
-        if existing:
-            doc["viewsCount"] = existing.get("viewsCount", 0)
-            doc["likesCount"] = existing.get("likesCount", 0)
-            doc["aiGenerationsCount"] = existing.get("aiGenerationsCount", 0)
-
-            news_col.update_one({"articleId": doc["articleId"]}, {"$set": doc})
-            updated += 1
-        else:
-            doc["createdAt"] = datetime.now(timezone.utc)
-            news_col.insert_one(doc)
-            inserted += 1
-
-    print(f"✅ News Saved — Inserted: {inserted}, Updated: {updated}")
+        ops = []
+        for article_id, doc in chunk:
+            op, kind = _article_write(article_id, doc, stored.get(article_id))
+            extra = copies.get(article_id, 0)
+            if kind == "skip":
+                skipped += 1 + extra
+                continue
+            updated += extra
+            if kind == "score":
+                score_only += 1 + extra
+            ops.append(op)
+        if not ops:
+            continue
+
+        try:
+            result = news_col.bulk_write(ops, ordered=False)
+            inserted += result.upserted_count
+            updated += result.matched_count
+        except BulkWriteError as e:
+            details = e.details
+            inserted += details.get("nUpserted", 0)
+            updated += details.get("nMatched", 0)
+            failed += len(details.get("writeErrors", []))
+            print(f"⚠️ {len(details.get('writeErrors', []))} article writes failed in batch")
+
+    print(f"✅ News Saved — Inserted: {inserted}, Updated: {updated} "
+          f"(score-only: {score_only}), Skipped unchanged: {skipped}")
+    return {"inserted": inserted, "updated": updated, "failed": failed,
+            "skipped": skipped, "score_only": score_only}
 
 # --- Save NewsMap ---
-def save_newsmap(map_data: dict):
+def _append_missing(field: str, values: list) -> dict:
+    """Pipeline-update equivalent of $addToSet/$each on an array field."""
+    existing = {"$ifNull": [f"${field}", []]}
+    # $addToSet also collapses repeats within $each (e.g. a feed fanned out to two categories)
+    return {"$concatArrays": [
+        existing,
+        {"$filter": {
+            "input": {"$literal": list(dict.fromkeys(values))},
+            "as": "v",
+            "cond": {"$not": [{"$in": ["$$v", existing]}]},
+        }},
+    ]}
+
+def save_newsmap(map_data: dict, chunk_size: int = BULK_CHUNK_SIZE):
+    """
+    Merge clusters into newsmap server-side with bulk pipeline upserts.
+    Sources and article ids accumulate across runs, firstSeen/lastSeen widen
+    with $min/$max and count is derived from the merged articleIds.
+    """
+    from pymongo import UpdateOne
+    from pymongo.errors import BulkWriteError
+
     inserted, updated = 0, 0
+    ops = []
     for md5_key, entry in map_data.items():
-        doc = {
-            "md5": entry.get("md5", md5_key),
-            "text": entry.get("text"),
-            "sources": entry.get("sources", []),
-            "articleIds": entry.get("article_ids", []),
-            "firstSeen": datetime.fromisoformat(entry["first_seen"].replace("Z", "+00:00")) if entry.get("first_seen") else None,
-            "lastSeen": datetime.fromisoformat(entry["last_seen"].replace("Z", "+00:00")) if entry.get("last_seen") else None,
-            "count": entry.get("count", 0),
-            "updatedAt": datetime.now(timezone.utc)
-        }
-
-        existing = newsmap_col.find_one({"md5": doc["md5"]})
-        if existing:
-            newsmap_col.update_one({"md5": doc["md5"]}, {"$set": doc})
-            updated += 1
-        else:
-            doc["createdAt"] = datetime.now(timezone.utc)
-            newsmap_col.insert_one(doc)
-            inserted += 1
+        first_seen = datetime.fromisoformat(entry["first_seen"].replace("Z", "+00:00")) if entry.get("first_seen") else None
+        last_seen = datetime.fromisoformat(entry["last_seen"].replace("Z", "+00:00")) if entry.get("last_seen") else None
+        now = datetime.now(timezone.utc)
+
+        ops.append(UpdateOne(
+            {"md5": entry.get("md5", md5_key)},
+            [
+                {"$set": {
+                    "text": {"$literal": entry.get("text")},
+                    "sources": _append_missing("sources", entry.get("sources", [])),
+                    "articleIds": _append_missing("articleIds", entry.get("article_ids", [])),
+                    "firstSeen": {"$min": ["$firstSeen", first_seen]},
+                    "lastSeen": {"$max": ["$lastSeen", last_seen]},
+                    "updatedAt": now,
+                    "createdAt": {"$ifNull": ["$createdAt", now]},
+                }},
+                {"$set": {"count": {"$size": "$articleIds"}}},
+            ],
+            upsert=True,
+        ))
+
+    for start in range(0, len(ops), chunk_size):
+        try:
+            result = get_collection("newsmap").bulk_write(ops[start:start + chunk_size], ordered=False)
+            inserted += result.upserted_count
+            updated += result.matched_count
+        except BulkWriteError as e:
+            details = e.details
+            inserted += details.get("nUpserted", 0)
+            updated += details.get("nMatched", 0)
+            print(f"⚠️ {len(details.get('writeErrors', []))} newsmap writes failed in batch")
 
     print(f"✅ NewsMap Saved — Inserted: {inserted}, Updated: {updated}")
+    return {"inserted": inserted, "updated": updated}
+
+# --- Load NewsMap History ---
+DEDUP_WINDOW_HOURS = 48  # how far back stories can still cluster across runs
+
+def _to_iso(value):
+    if not value:
+        return ""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    # keep the fetched_at shape ("...:SS.ffffff+00:00") that calculate_score parses
+    return value.isoformat(timespec="microseconds")
+
+def load_recent_clusters(window_hours: int = DEDUP_WINDOW_HOURS) -> list:
+    """
+    Clusters last seen inside the window, shaped like news_map entries.
+    articleIds are left out of the projection: the in-memory index only needs
+    text, sources and timestamps, and save_newsmap merges new ids server-side.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=window_hours)
+    cursor = get_collection("newsmap").find(
+        {"lastSeen": {"$gte": cutoff}},
+        {"_id": 0, "md5": 1, "text": 1, "sources": 1, "firstSeen": 1, "lastSeen": 1},
+    )
+    return [
+        {
+            "md5": doc["md5"],
+            "text": doc.get("text"),
+            "sources": doc.get("sources", []),
+            "article_ids": [],
+            "first_seen": _to_iso(doc.get("firstSeen")),
+            "last_seen": _to_iso(doc.get("lastSeen")),
+        }
+        for doc in cursor
+    ]
 
 # --- Debug Utility: Save JSON to file ---
 def dump_to_file(data, filename):
     os.makedirs("debug_output", exist_ok=True)
     path = os.path.join("debug_output", filename)
     with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+        json.dump(data, f, ensure_ascii=False, indent=2,
+                  default=lambda o: o.to_dict() if isinstance(o, Article) else str(o))
     print(f"📂 Dumped {filename} → {path}")
 
 # --- Save Logs ---
@@ -126,52 +255,334 @@ def save_logs(logs: list, log_collection):
     log_collection.insert_many(logs)
 
 
+# --- Top Stories ---
+TOP_STORIES_LIMIT = 20          # stories kept per category
+TOP_STORIES_MAX_AGE_HOURS = 48  # older stories drop out of the hot feed
+TOP_STORY_FIELDS = ("articleId", "title", "description", "source", "url", "imageUrl",
+                    "category", "tags", "publishedAt", "score", "hotness")
+
+def _as_utc(value):
+    # pymongo hands datetimes back naive; they are stored as UTC
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+def _as_stored(value):
+    """A datetime the way Mongo returns it (naive UTC, milliseconds), so stored and new stories compare equal."""
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.replace(microsecond=value.microsecond // 1000 * 1000)
+
+def _rank_stories(stories, cutoff, limit: int) -> list:
+    """Last copy of each article, published after `cutoff`, best `limit` by score (newest first on ties)."""
+    latest = {story["articleId"]: story for story in stories}
+    fresh = [s for s in latest.values() if s.get("publishedAt") and _as_utc(s["publishedAt"]) >= cutoff]
+    fresh.sort(key=lambda s: (s.get("score") or 0, _as_utc(s["publishedAt"])), reverse=True)
+    return fresh[:limit]
+
+def refresh_top_stories(articles: list, limit: int = TOP_STORIES_LIMIT,
+                        max_age_hours: int = TOP_STORIES_MAX_AGE_HOURS):
+    """
+    Fold a just-saved batch into top_stories, one document per category
+    holding its best `limit` stories by score, so the hot feed is a single
+    find_one on the category index. The stored lists are merged with the
+    batch instead of re-sorting news; stories past `max_age_hours` drop out.
+    A category is topped up from news through the (category, publishedAt)
+    index when it has no document yet, when aging left it short, or when a
+    stored story was re-scored below the list's cut-off (the next-best
+    article is then only in news).
+    """
+    from pymongo import ReplaceOne
+
+    top_col = get_collection("top_stories")
+    now = datetime.now(timezone.utc)
+    cutoff = now - timedelta(hours=max_age_hours)
+
+    incoming = {}
+    for article in articles:
+        doc = as_article(article).to_mongo()
+        if doc["category"]:
+            story = {field: doc[field] for field in TOP_STORY_FIELDS}
+            story["publishedAt"] = _as_stored(story["publishedAt"])
+            incoming.setdefault(doc["category"], []).append(story)
+
+    stored = {doc["category"]: doc["stories"] for doc in top_col.find({}, {"_id": 0, "category": 1, "stories": 1})}
+
+    ops = []
+    topped_up = 0
+    for category in stored.keys() | incoming.keys():
+        previous = stored.get(category)
+        batch = incoming.get(category, [])
+        stories = _rank_stories((previous or []) + batch, cutoff, limit)
+        if previous is None:
+            top_up = True
+        else:
+            aged_out = any(not s.get("publishedAt") or _as_utc(s["publishedAt"]) < cutoff for s in previous)
+            # with a full list, anything not in it scored at most the cut-off
+            list_cutoff = min((s.get("score") or 0 for s in previous), default=0) if len(previous) >= limit else None
+            previous_ids = {s["articleId"] for s in previous}
+            demoted = list_cutoff is not None and any(
+                s["articleId"] in previous_ids and (s.get("score") or 0) < list_cutoff for s in batch
+            )
+            top_up = demoted or (aged_out and len(stories) < limit)
+        if top_up:
+            recent = get_collection("news").find(
+                {"category": category, "publishedAt": {"$gte": cutoff}},
+                {"_id": 0, **{field: 1 for field in TOP_STORY_FIELDS}},
+            ).sort("score", -1).limit(limit)
+            # batch copies go last so their fresher scores win the merge
+            stories = _rank_stories(list(recent) + stories, cutoff, limit)
+            topped_up += 1
+        if stories == previous:
+            continue
+        ops.append(ReplaceOne(
+            {"category": category},
+            {"category": category, "stories": stories, "updatedAt": now},
+            upsert=True,
+        ))
+
+    if ops:
+        top_col.bulk_write(ops, ordered=False)
+    print(f"✅ Top Stories Refreshed — Categories updated: {len(ops)}, Topped up from news: {topped_up}")
+    return {"categories": len(ops), "topped_up": topped_up}
+
+
 # --- Indexes ---
 def create_indexes():
-    news_col.create_index("articleId", unique=True)
-    news_col.create_index("date")
-    news_col.create_index("category")
-    news_col.create_index([("tags", 1)])
-    news_col.create_index([("publishedAt", -1)])
+    """
+    Indexes for the pipeline's own lookups and the app's read patterns:
+    category feeds by recency, daily lists and hotness tiers by score.
+    Single-field category/date indexes are covered by the compound prefixes.
+    Creating an index that already exists is a no-op, so this runs every time.
+    """
+    from pymongo import IndexModel
+
+    indexes = {
+        "news": [
+            IndexModel("articleId", unique=True),
+            IndexModel([("category", 1), ("publishedAt", -1)]),
+            IndexModel([("date", -1), ("score", -1)]),
+            IndexModel([("hotness", 1), ("score", -1)]),
+            IndexModel([("tags", 1)]),
+            IndexModel([("publishedAt", -1)]),
+        ],
+        "newsmap": [
+            IndexModel("md5", unique=True),
+            IndexModel([("lastSeen", -1)]),
+        ],
+        "top_stories": [
+            IndexModel("category", unique=True),
+        ],
+    }
+    for name, models in indexes.items():
+        try:
+            get_collection(name).create_indexes(models)
+        except Exception as e:
+            print(f"⚠️ Could not create indexes on {name}: {e}")
 
 
 # --- Main Pipeline ---
-if __name__ == "__main__":
+STREAM_BATCH_SIZE = 200  # articles per write flush in streaming mode
+
+def _load_history(incremental: bool):
+    if not incremental:
+        return None
+    history = load_recent_clusters()
+    print(f"🗂️ Loaded {len(history)} clusters from the last {DEDUP_WINDOW_HOURS}h")
+    return history
+
+def _commit_seen(seen, failed: int):
+    """Advance the RSS high-water marks only once every article write went through."""
+    if failed:
+        print(f"⚠️ {failed} article writes failed, keeping RSS seen marks for a retry next run")
+        return
+    seen.commit()
+
+def _rss_fetched_any(rss_logs):
+    """True if at least one feed answered, even if every entry was already seen."""
+    return any(log.get("type") != "summary" and log["error"] is None for log in rss_logs)
+
+def _finish_metrics(run, mode: str, store: bool = True):
+    """Store the run's metrics document in pipeline_runs, print the stage table and write any profiles."""
+    pipeline_metrics.end_run()
+    if not run.enabled:
+        return
+    doc = run.to_doc()
+    doc["mode"] = mode
+    if store:
+        try:
+            get_collection("pipeline_runs").insert_one(doc)
+        except Exception as e:
+            print(f"⚠️ Could not save pipeline run metrics: {e}")
+    run.print_summary(doc)
+    if run.profiler is not None:
+        run.profiler.write_report()
+
+def run_pipeline(incremental: bool = False, workers: int = 1, full_reingest: bool = RSS_FULL_REINGEST,
+                 metrics: bool = PIPELINE_METRICS, profiler=None):
+    run = pipeline_metrics.start_run(metrics, profiler)
+    # a profiled stage only sees its own thread, so fetch sequentially while profiling
+    concurrent = profiler is None
+
+    with stage("indexes"):
+        create_indexes()
+
     print("📡 Fetching GNews...")
-    gnews_data, gnews_logs = collect_news()
+    with stage("gnews") as st:
+        gnews_data, gnews_logs = collect_news(concurrent=concurrent)
+        st.items_out = sum(len(items) for items in gnews_data.values())
     # dump_to_file(gnews_data, "01_gnews_data.json")
 
     print("📡 Fetching RSS...")
-    for attempt in range(3):
-        rss_data, rss_logs = fetch_rss_news()
-        if rss_data:
-            break
-        print(f"⚠️ RSS attempt {attempt+1} failed, retrying...")
-        time.sleep(5)
+    seen = SeenEntries.load(full_reingest=full_reingest)
+    with stage("rss") as st:
+        for attempt in range(3):
+            rss_data, rss_logs = fetch_rss_news(concurrent=concurrent, parse_workers=workers, seen=seen)
+            if _rss_fetched_any(rss_logs):
+                break
+            print(f"⚠️ RSS attempt {attempt+1} failed, retrying...")
+            time.sleep(5)
+        st.items_out = len(rss_data)
     # dump_to_file(rss_data, "02_rss_data.json")
 
     print("🔄 Combining...")
-    combined_data = combine_news(gnews_data, rss_data)
+    with stage("combine") as st:
+        combined_data = combine_news(gnews_data, rss_data)
+        combined_count = len(combined_data)
+        st.items_out = combined_count
     # dump_to_file(combined_data, "03_combined.json")
 
     print("⚡ Processing...")
-    updated_articles, news_map = process_news_file(combined_data)
+    history = _load_history(incremental)
+    # items out = clusters created or extended
+    with stage("dedup_score", items_in=combined_count) as st:
+        updated_articles, news_map = process_news_file(combined_data, history=history, workers=workers)
+        st.items_out = len(news_map)
     # dump_to_file(updated_articles, "04_processed_articles.json")
     # dump_to_file(news_map, "05_newsmap.json")
 
     print("💾 Saving Articles...")
-    stats = save_articles(updated_articles)
+    with stage("save_articles", items_in=len(updated_articles)) as st:
+        stats = save_articles(updated_articles)
+        st.items_out = stats["inserted"] + stats["updated"]
+    _commit_seen(seen, stats["failed"])
     # dump_to_file(stats, "06_save_stats.json")
 
+    print("🔥 Refreshing top stories...")
+    with stage("top_stories", items_in=len(updated_articles)) as st:
+        st.items_out = refresh_top_stories(updated_articles)["categories"]
+
     # print("Saving Articles to Supabase...")
     # save_articles_to_supabase(updated_articles)
 
     print("📝 Saving news_map to mongodb...")
-    save_newsmap(news_map)
+    with stage("save_newsmap", items_in=len(news_map)):
+        save_newsmap(news_map)
   
   
     print("📝 Saving Logs...")
-    save_logs(gnews_logs, gnews_logs_col)
-    save_logs(rss_logs, rss_logs_col)
+    with stage("save_logs", items_in=len(gnews_logs) + len(rss_logs)):
+        save_logs(gnews_logs, get_collection("gnews_logs"))
+        save_logs(rss_logs, get_collection("rss_logs"))
 
     print("🎯 Pipeline completed successfully!")
+    _finish_metrics(run, "batch", store=metrics)
+
+def run_streaming_pipeline(batch_size: int = STREAM_BATCH_SIZE, incremental: bool = False,
+                           workers: int = 1, full_reingest: bool = RSS_FULL_REINGEST,
+                           metrics: bool = PIPELINE_METRICS, profiler=None):
+    """
+    Same stages as run_pipeline, overlapped: GNews and RSS articles are
+    deduped and scored as they arrive and written every `batch_size`
+    articles, so only one batch of articles is held in memory at a time.
+    top_stories is refreshed after every flush.
+    With a profiler, only main-thread work (dedup, scoring, writes) shows
+    up in the profiles; fetching happens on the producer threads.
+    """
+    run = pipeline_metrics.start_run(metrics, profiler)
+    with stage("indexes"):
+        create_indexes()
+    gnews_logs, rss_logs = [], []
+    deduper = NewsDeduper()
+    history = _load_history(incremental)
+    if history:
+        with stage("seed_history", items_in=len(history)):
+            deduper.seed(history, workers)
+    seen = SeenEntries.load(full_reingest=full_reingest)
+    batch = []
+    totals = {"inserted": 0, "updated": 0, "failed": 0, "skipped": 0, "score_only": 0}
+
+    def flush():
+        with stage("save_articles", items_in=len(batch)) as st:
+            stats = save_articles(batch)
+            st.items_out = stats["inserted"] + stats["updated"]
+        for key in totals:
+            totals[key] += stats[key]
+        with stage("top_stories", items_in=len(batch)) as st:
+            st.items_out = refresh_top_stories(batch)["categories"]
+        batch.clear()
+
+    print("📡 Streaming GNews + RSS → processing → saving...")
+    # fetch, dedup/score and writes overlap, so "stream" is their combined wall time
+    with stage("stream") as st:
+        count = 0
+        sources = (iter_gnews_news(gnews_logs), iter_rss_news(rss_logs, parse_workers=workers, seen=seen))
+        for raw_article in stream_news(*sources):
+            batch.append(deduper.add(raw_article))
+            count += 1
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+        st.items_out = count
+    print(f"💾 Articles Saved — Inserted: {totals['inserted']}, Updated: {totals['updated']} "
+          f"(score-only: {totals['score_only']}), Skipped unchanged: {totals['skipped']}")
+    _commit_seen(seen, totals["failed"])
+
+    print("📝 Saving news_map to mongodb...")
+    news_map = deduper.news_map(changed_only=True)
+    with stage("save_newsmap", items_in=len(news_map)):
+        save_newsmap(news_map)
+
+    print("📝 Saving Logs...")
+    with stage("save_logs", items_in=len(gnews_logs) + len(rss_logs)):
+        save_logs(gnews_logs, get_collection("gnews_logs"))
+        save_logs(rss_logs, get_collection("rss_logs"))
+
+    print("🎯 Pipeline completed successfully!")
+    _finish_metrics(run, "stream", store=metrics)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch, dedupe, score and save news.")
+    parser.add_argument("--stream", action="store_true",
+                        help="overlap fetching, processing and writes instead of running stages in turn")
+    parser.add_argument("--batch-size", type=int, default=STREAM_BATCH_SIZE,
+                        help="articles per write flush in --stream mode")
+    parser.add_argument("--incremental", action="store_true",
+                        help=f"match against newsmap clusters from the last {DEDUP_WINDOW_HOURS}h")
+    parser.add_argument("--workers", type=int, default=PROCESS_WORKERS,
+                        help="processes for feed parsing and dedup hashing (default: CPU count, 1 = in-process)")
+    parser.add_argument("--full-reingest", action="store_true", default=RSS_FULL_REINGEST,
+                        help="push every RSS entry through again, ignoring the per-feed seen marks")
+    parser.add_argument("--no-metrics", action="store_true",
+                        help="skip per-stage timing and the pipeline_runs record (same as PIPELINE_METRICS=0)")
+    parser.add_argument("--profile", nargs="?", const=PROFILE_DEFAULT_DIR, default=None, metavar="DIR",
+                        help=f"cProfile + tracemalloc each stage into DIR (default {PROFILE_DEFAULT_DIR}; "
+                             "or set PIPELINE_PROFILE_DIR)")
+    args = parser.parse_args()
+    metrics = PIPELINE_METRICS and not args.no_metrics
+    profiler = profiler_from(args.profile)
+    workers = args.workers
+    if profiler is not None and workers > 1:
+        print("🔬 Profiling: running parse and dedup in-process (--workers 1)")
+        workers = 1
+
+    if args.stream:
+        run_streaming_pipeline(args.batch_size, incremental=args.incremental, workers=workers,
+                               full_reingest=args.full_reingest, metrics=metrics, profiler=profiler)
+    else:
+        run_pipeline(incremental=args.incremental, workers=workers, full_reingest=args.full_reingest,
+                     metrics=metrics, profiler=profiler)
@@ -1,7 +1,9 @@
 import os
-from datetime import datetime, timezone
+import time
+from functools import lru_cache
 from dotenv import load_dotenv
-from supabase import create_client, Client
+
+from article import as_article
 
 # --- Load .env ---
 load_dotenv()
@@ -10,64 +12,115 @@ SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_API_KEY = os.getenv("SUPABASE_API_KEY")
 
 # --- Supabase Client Initialization ---
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_API_KEY)
+@lru_cache(maxsize=None)
+def get_supabase():
+    """Supabase client, created (and the supabase package imported) on first use."""
+    from supabase import create_client
+
+    return create_client(SUPABASE_URL, SUPABASE_API_KEY)
 
 # --- Table Names ---
 NEWS_TABLE = "news_articles"
 
+# --- Batching ---
+SUPABASE_BATCH_SIZE = 200  # rows per upsert request
+SUPABASE_BATCH_RETRIES = 1  # retries of a whole batch before bisecting it
+# Errors one bad row can cause: Postgres data exceptions (22xxx) and constraint
+# violations (23xxx), or a plain 4xx PostgREST reports without a SQLSTATE
+ROW_ERROR_SQLSTATE_CLASSES = ("22", "23")
+NON_ROW_HTTP_ERRORS = ("401", "403", "408", "429")
+
+def build_supabase_doc(article) -> dict:
+    """Row for the news table; see Article.to_supabase."""
+    return as_article(article).to_supabase()
+
+def _is_row_error(error) -> bool:
+    """
+    True if the rows themselves may be at fault. Transport errors, 5xx and
+    auth/rate-limit responses fail every row alike, so bisecting can't help.
+    """
+    code = str(getattr(error, "code", None) or "")  # postgrest APIError.code
+    if len(code) == 5:
+        return code[:2] in ROW_ERROR_SQLSTATE_CLASSES
+    return code.isdigit() and code.startswith("4") and code not in NON_ROW_HTTP_ERRORS
+
+def _upsert_rows(client, rows: list, retries: int, batch_stats: dict) -> list:
+    """
+    Upsert rows on article_id, retrying the whole batch. On a row-level
+    error the batch is bisected so one bad row only loses itself; any other
+    failure (network, 5xx) drops the batch as a whole. Returns the rows that
+    were saved.
+    """
+    error = None
+    for _ in range(retries + 1):
+        batch_stats["requests"] += 1
+        try:
+            client.table(NEWS_TABLE).upsert(rows, on_conflict="article_id").execute()
+            return rows
+        except Exception as e:
+            error = e
+
+    if not _is_row_error(error):
+        batch_stats["errors"] += len(rows)
+        print(f"❌ Error saving {len(rows)} articles: {error}")
+        return []
+
+    if len(rows) == 1:
+        batch_stats["errors"] += 1
+        print(f"❌ Error saving article {rows[0]['article_id']}: {error}")
+        return []
+
+    mid = len(rows) // 2
+    return (_upsert_rows(client, rows[:mid], 0, batch_stats)
+            + _upsert_rows(client, rows[mid:], 0, batch_stats))
+
 # --- Save Articles to Supabase ---
-def save_articles_to_supabase(articles: list):
+def save_articles_to_supabase(articles: list, batch_size: int = SUPABASE_BATCH_SIZE,
+                              retries: int = SUPABASE_BATCH_RETRIES, client=None):
     """
-    Insert or update articles in Supabase news table
-    Returns: dict with inserted and updated count
+    Upsert articles into the Supabase news table in batches of `batch_size`.
+    `client` defaults to get_supabase(); pass any object with the
+    supabase-py table() interface (e.g. a local PostgREST stub) to test.
+    Returns: dict with inserted/updated/errors counts and per-batch stats
     """
-    inserted, updated = 0, 0
-    
+    client = client or get_supabase()
+    inserted, updated, errors = 0, 0, 0
+    batches = []
+
+    # Postgres rejects an upsert that touches the same row twice, so keep the
+    # last copy of a repeated article_id and count the others as updates.
+    rows = {}
     for article in articles:
-        published_at = article.get("published_at")
-
-        doc = {
-            "article_id": article.get("article_id"),
-            "title": article.get("title"),
-            "description": article.get("description"),
-            "author": article.get("author"),
-            "source": article.get("source"),
-            "url": article.get("url"),
-            "image_url": article.get("image_url"),
-            "category": article.get("category"),
-            "tags": article.get("tags", []),
-            "published_at": published_at,
-            "score": article.get("score"),
-            "hotness": article.get("hotness"),
-            "impact_score": article.get("impact_score"),
-            "popularity_score": article.get("popularity_score", 0),
-            "views_count": 0,
-            "likes_count": 0,
-            "ai_generations_count": 0,
-            "updated_at": datetime.now(timezone.utc).isoformat(),
-            #one column is not here comic_image which is null by default, when we need, will add it.
-        }
+        doc = build_supabase_doc(article)
+        if doc["article_id"] in rows:
+            updated += 1
+        rows[doc["article_id"]] = doc
+    rows = list(rows.values())
+
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        batch_stats = {"size": len(batch), "requests": 0, "errors": 0, "latency_ms": None}
+        started = time.monotonic()
 
+        ids = [row["article_id"] for row in batch]
         try:
-            # Check if article exists
-            response = supabase.table(NEWS_TABLE).select("article_id").eq(
-                "article_id", doc["article_id"]
-            ).execute()
-
-            if response.data:
-                # Update existing article
-                supabase.table(NEWS_TABLE).update(doc).eq(
-                    "article_id", doc["article_id"]
-                ).execute()
+            batch_stats["requests"] += 1
+            response = client.table(NEWS_TABLE).select("article_id").in_("article_id", ids).execute()
+            existing = {row["article_id"] for row in response.data}
+        except Exception as e:
+            print(f"⚠️ Could not look up existing articles: {e}")
+            existing = set()
+
+        saved = _upsert_rows(client, batch, retries, batch_stats)
+        for row in saved:
+            if row["article_id"] in existing:
                 updated += 1
             else:
-                # Insert new article
-                doc["created_at"] = datetime.now(timezone.utc).isoformat()
-                supabase.table(NEWS_TABLE).insert(doc).execute()
                 inserted += 1
 
-        except Exception as e:
-            print(f"❌ Error saving article {doc['article_id']}: {e}")
+        errors += batch_stats["errors"]
+        batch_stats["latency_ms"] = round((time.monotonic() - started) * 1000, 1)
+        batches.append(batch_stats)
 
-    print(f"✅ Supabase Articles Saved — Inserted: {inserted}, Updated: {updated}")
-    return {"inserted": inserted, "updated": updated}
+    print(f"✅ Supabase Articles Saved — Inserted: {inserted}, Updated: {updated}, Errors: {errors}")
+    return {"inserted": inserted, "updated": updated, "errors": errors, "batches": batches}